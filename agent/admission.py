@@ -0,0 +1,140 @@
+"""Admission control for evaluation and verification intake"""
+import bisect
+import math
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 0 disables a limit
+MAX_EVALUATION_QUEUE_DEPTH = int(os.getenv('MAX_EVALUATION_QUEUE_DEPTH', '200'))
+MAX_VERIFICATION_QUEUE_DEPTH = int(os.getenv('MAX_VERIFICATION_QUEUE_DEPTH', '200'))
+MAX_ACTIVE_PER_WALLET = int(os.getenv('MAX_ACTIVE_PER_WALLET', '5'))
+MAX_ACTIVE_PER_TASK = int(os.getenv('MAX_ACTIVE_PER_TASK', '100'))
+# Retry-After used before any completion has been observed
+ADMISSION_DEFAULT_RETRY_AFTER = int(os.getenv('ADMISSION_DEFAULT_RETRY_AFTER', '10'))
+# Seconds of completions used to estimate the drain rate
+DRAIN_RATE_WINDOW = 300.0
+
+class AdmissionController:
+    """Bounds queued work, enforces per-wallet/per-task quotas and coalesces duplicates"""
+
+    def __init__(self, queue_depth, status_of, finished_statuses):
+        # queue_depth(kind) -> items waiting; status_of(kind, interaction_id) -> record or None
+        self._queue_depth = queue_depth
+        self._status_of = status_of
+        self._finished_statuses = finished_statuses
+        self._max_depth = {
+            'evaluation': MAX_EVALUATION_QUEUE_DEPTH,
+            'verification': MAX_VERIFICATION_QUEUE_DEPTH
+        }
+        self._active = {}
+        self._coalesce_keys = {}
+        # Sorted times at which admitted interactions finished
+        self._completions = {'evaluation': [], 'verification': []}
+        self._lock = threading.Lock()
+        self.stats = {'admitted': 0, 'coalesced': 0, 'rejected_queue': 0, 'rejected_wallet': 0, 'rejected_task': 0}
+
+    def _prune(self):
+        """Forget finished interactions and record when they drained"""
+        now = time.monotonic()
+        for interaction_id, entry in list(self._active.items()):
+            record = self._status_of(entry['kind'], interaction_id)
+            if record and record.get('status') in self._finished_statuses:
+                del self._active[interaction_id]
+                # Cache hits finish as they are admitted and say nothing about how fast queued work drains
+                if not record.get('cached'):
+                    # When it actually finished, not when this prune noticed it
+                    bisect.insort(self._completions[entry['kind']], record.get('finished_at', now))
+                if entry['coalesce_key'] and self._coalesce_keys.get(entry['coalesce_key']) == interaction_id:
+                    del self._coalesce_keys[entry['coalesce_key']]
+
+        for completions in self._completions.values():
+            del completions[:bisect.bisect_left(completions, now - DRAIN_RATE_WINDOW)]
+
+    def drain_rate(self, kind: str) -> float:
+        """Completions per second over the recent window"""
+        completions = self._completions[kind]
+        if len(completions) < 2:
+            return 0.0
+        span = max(time.monotonic() - completions[0], 1.0)
+        return len(completions) / span
+
+    def _retry_after(self, kind: str, excess: int) -> int:
+        rate = self.drain_rate(kind)
+        if rate <= 0:
+            return ADMISSION_DEFAULT_RETRY_AFTER
+        return max(1, min(math.ceil(max(excess, 1) / rate), int(DRAIN_RATE_WINDOW)))
+
+    def _count_active(self, field: str, value: str) -> int:
+        return sum(1 for entry in self._active.values() if entry[field] == value)
+
+    def admit(self, kind: str, interaction_ids: list, task_id: str = None, wallet: str = None, coalesce: bool = False) -> dict:
+        """Register new work, or explain why it was coalesced or rejected"""
+        with self._lock:
+            self._prune()
+
+            coalesce_key = (kind, task_id, wallet) if coalesce and task_id and wallet else None
+            if coalesce_key and coalesce_key in self._coalesce_keys:
+                self.stats['coalesced'] += 1
+                return {'coalesced': self._coalesce_keys[coalesce_key]}
+
+            count = len(interaction_ids)
+            max_depth = self._max_depth[kind]
+            depth = self._queue_depth(kind)
+            if max_depth and depth + count > max_depth:
+                self.stats['rejected_queue'] += 1
+                return {
+                    'error': f'Too many queued {kind}s, try again later',
+                    'retry_after': self._retry_after(kind, depth + count - max_depth)
+                }
+
+            if MAX_ACTIVE_PER_WALLET and wallet:
+                active = self._count_active('wallet', wallet)
+                if active + count > MAX_ACTIVE_PER_WALLET:
+                    self.stats['rejected_wallet'] += 1
+                    return {
+                        'error': f'Wallet already has {active} active interactions',
+                        'retry_after': self._retry_after(kind, active + count - MAX_ACTIVE_PER_WALLET)
+                    }
+
+            if MAX_ACTIVE_PER_TASK and task_id:
+                active = self._count_active('task_id', task_id)
+                if active + count > MAX_ACTIVE_PER_TASK:
+                    self.stats['rejected_task'] += 1
+                    return {
+                        'error': f'Task already has {active} active interactions',
+                        'retry_after': self._retry_after(kind, active + count - MAX_ACTIVE_PER_TASK)
+                    }
+
+            for interaction_id in interaction_ids:
+                self._active[interaction_id] = {
+                    'kind': kind,
+                    'task_id': task_id,
+                    'wallet': wallet,
+                    'coalesce_key': coalesce_key
+                }
+            if coalesce_key:
+                self._coalesce_keys[coalesce_key] = interaction_ids[0]
+            self.stats['admitted'] += count
+            return {}
+
+    def release(self, interaction_ids: list):
+        """Drop work that was admitted but never queued"""
+        with self._lock:
+            for interaction_id in interaction_ids:
+                entry = self._active.pop(interaction_id, None)
+                if entry and entry['coalesce_key'] and self._coalesce_keys.get(entry['coalesce_key']) == interaction_id:
+                    del self._coalesce_keys[entry['coalesce_key']]
+
+    def metrics(self) -> dict:
+        with self._lock:
+            self._prune()
+            return {
+                **self.stats,
+                'active': len(self._active),
+                'queue_depth': {kind: self._queue_depth(kind) for kind in self._max_depth},
+                'drain_rate_per_second': {kind: round(self.drain_rate(kind), 4) for kind in self._max_depth}
+            }
@@ -0,0 +1,216 @@
+"""ASGI server + uAgents Bureau on a single event loop"""
+import asyncio
+import os
+from quart import Quart, request, jsonify, Response
+from quart_cors import cors
+from uagents import Bureau
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# The Bureau and the agents bind to the loop that is current when they are created
+loop = asyncio.new_event_loop()
+asyncio.set_event_loop(loop)
+
+# Import agents
+from client_agent import (
+    client_agent,
+    get_evaluation_status,
+    get_verification_status,
+    dispatch_queued_work
+)
+from freelancer_agent import freelancer_agents
+from interaction_api import (
+    start_evaluation_request,
+    start_bulk_evaluation_request,
+    bulk_evaluation_status,
+    bulk_evaluation_event,
+    claim_freelancer_assignment,
+    assign_freelancer,
+    reasoning_payload,
+    verification_payload,
+    status_body,
+    status_event,
+    start_verification_request,
+    complete_payment_request,
+    cancel_interaction_request,
+    health_payload,
+    metrics_payload,
+    agent_addresses_payload
+)
+
+ASGI_HOST = os.getenv('ASGI_HOST', '0.0.0.0')
+ASGI_PORT = int(os.getenv('ASGI_PORT', '5000'))
+# Seconds between change checks of an open status stream
+STATUS_STREAM_INTERVAL = float(os.getenv('STATUS_STREAM_INTERVAL', '0.5'))
+
+app = cors(Quart(__name__), allow_origin='*')
+
+# Bureau to run the Client Agent and every Freelancer Agent replica
+bureau = Bureau(port=8000, loop=loop)
+bureau.add(client_agent)
+for agent in freelancer_agents:
+    bureau.add(agent)
+
+bureau_running = False
+
+def status_response(record: dict, build_payload):
+    """Status poll response, served from a pre-encoded snapshot once completed"""
+    body, headers = status_body(record, build_payload, request.headers.get('Accept-Encoding', ''))
+    return Response(body, mimetype='application/json', headers=headers)
+
+def status_stream(record: dict, build_payload):
+    """Stream a status payload as server-sent events until the interaction finishes"""
+    async def generate():
+        fingerprint = None
+        while True:
+            event, fingerprint, done = status_event(record, build_payload, fingerprint)
+            if event:
+                yield event
+            if done:
+                break
+            await asyncio.sleep(STATUS_STREAM_INTERVAL)
+
+    response = Response(generate(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+    response.timeout = None
+    return response
+
+@app.route('/health', methods=['GET'])
+async def health():
+    return jsonify(health_payload(bureau_running))
+
+@app.route('/evaluate-freelancer', methods=['POST'])
+async def evaluate_freelancer():
+    """Endpoint to trigger evaluation"""
+    payload, status, headers = start_evaluation_request(await request.get_json())
+    dispatch_queued_work()
+    return jsonify(payload), status, headers
+
+@app.route('/evaluate-freelancers', methods=['POST'])
+async def evaluate_freelancers():
+    """Endpoint to evaluate many candidates for one task"""
+    payload, status, headers = start_bulk_evaluation_request(await request.get_json())
+    dispatch_queued_work()
+    return jsonify(payload), status, headers
+
+@app.route('/bulk-evaluation-status/<batch_id>', methods=['GET'])
+async def get_bulk_evaluation_status(batch_id):
+    """Get progress and ranked shortlist of a bulk evaluation"""
+    payload, status = bulk_evaluation_status(batch_id)
+    return jsonify(payload), status
+
+@app.route('/bulk-evaluation-stream/<batch_id>', methods=['GET'])
+async def bulk_evaluation_stream(batch_id):
+    """Stream bulk evaluation progress as server-sent events"""
+    payload, status = bulk_evaluation_status(batch_id)
+    if status != 200:
+        return jsonify(payload), status
+
+    async def generate():
+        last_event = None
+        while True:
+            event, last_event, done = bulk_evaluation_event(batch_id, last_event)
+            if event:
+                yield event
+            if done:
+                break
+            await asyncio.sleep(1)
+
+    response = Response(generate(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+    response.timeout = None
+    return response
+
+@app.route('/reasoning-status/<interaction_id>', methods=['GET'])
+async def get_reasoning_status(interaction_id):
+    """Get evaluation status from Client Agent's storage"""
+    try:
+        evaluation = get_evaluation_status(interaction_id)
+
+        if not evaluation:
+            return jsonify({'error': 'Interaction not found'}), 404
+
+        # If approved and completed, update database and notify frontend
+        task_id = request.args.get('task_id')
+        freelancer_wallet = request.args.get('freelancer_wallet')
+        if claim_freelancer_assignment(evaluation, task_id, freelancer_wallet):
+            await asyncio.to_thread(assign_freelancer, evaluation, task_id, freelancer_wallet)
+
+        return status_response(evaluation, reasoning_payload)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/reasoning-stream/<interaction_id>', methods=['GET'])
+async def stream_reasoning_status(interaction_id):
+    """Stream evaluation status as server-sent events"""
+    evaluation = get_evaluation_status(interaction_id)
+
+    if not evaluation:
+        return jsonify({'error': 'Interaction not found'}), 404
+
+    return status_stream(evaluation, reasoning_payload)
+
+@app.route('/verify-submission', methods=['POST'])
+async def verify_submission():
+    """Start work verification process"""
+    payload, status, headers = start_verification_request(await request.get_json())
+    dispatch_queued_work()
+    return jsonify(payload), status, headers
+
+@app.route('/verification-status/<interaction_id>', methods=['GET'])
+async def get_verification_result(interaction_id):
+    """Get verification status and result"""
+    try:
+        verification = get_verification_status(interaction_id)
+
+        if not verification:
+            return jsonify({'error': 'Verification not found'}), 404
+
+        return status_response(verification, verification_payload)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/verification-stream/<interaction_id>', methods=['GET'])
+async def stream_verification_status(interaction_id):
+    """Stream verification status as server-sent events"""
+    verification = get_verification_status(interaction_id)
+
+    if not verification:
+        return jsonify({'error': 'Verification not found'}), 404
+
+    return status_stream(verification, verification_payload)
+
+@app.route('/complete-payment/<interaction_id>', methods=['POST'])
+async def complete_payment(interaction_id):
+    """Mark payment as completed and update task status"""
+    data = await request.get_json()
+    payload, status = await asyncio.to_thread(complete_payment_request, interaction_id, data)
+    return jsonify(payload), status
+
+@app.route('/interaction/<interaction_id>', methods=['DELETE'])
+async def cancel_interaction(interaction_id):
+    """Cancel an evaluation or verification, stopping its in-flight LLM work"""
+    payload, status = cancel_interaction_request(interaction_id)
+    return jsonify(payload), status
+
+@app.route('/metrics', methods=['GET'])
+async def metrics():
+    return jsonify(metrics_payload())
+
+@app.route('/agent-addresses', methods=['GET'])
+async def agent_addresses():
+    return jsonify(agent_addresses_payload())
+
+async def serve():
+    """Run the HTTP API and the Bureau side by side"""
+    global bureau_running
+    bureau_running = True
+    await asyncio.gather(
+        bureau.run_async(),
+        app.run_task(host=ASGI_HOST, port=ASGI_PORT)
+    )
+
+if __name__ == '__main__':
+
+    loop.run_until_complete(serve())
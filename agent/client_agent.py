@@ -1,20 +1,36 @@
 """Client Agent - Evaluates freelancer applications"""
 from uagents import Agent, Context, Protocol
-from openai import OpenAI
+from llm_cassette import make_asi_client
 import os
-from datetime import datetime
-from uuid import uuid4
 from message_models import (
     EvaluationIntroduction,
     IntroductionAcknowledgment,
+    AcknowledgmentUpdate,
     ProfileDataMessage,
     QuestionMessage,
     QuestionResponse,
     VerificationRequest,
-    VerificationResponse
+    VerificationResponse,
+    EvaluationClosed
 )
-from queue import Queue
+from transcript import Transcript
+from prompt_builder import (
+    fit_prompt,
+    complete,
+    truncate_text,
+    compact_description,
+    compact_requirements,
+    compact_submission,
+    compact_answer
+)
+from verification_cache import verification_cache, verification_cache_key
+from scheduler import FairScheduler
+from skill_index import SKILL_PRESCREEN_DEPRIORITIZED_COST
+from message_templates import AGENT_MESSAGE_MODE, introduction_template
+from response_snapshot import invalidate_snapshot
 import asyncio
+import functools
+import time
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -25,28 +41,198 @@ client_agent = Agent(
     name="client_evaluator",
     port=8001,
     seed="client_agent_seed_phrase_12345",
-    endpoint=["http://localhost:8001/submit"]
+    endpoint=["http://localhost:8001/submit"],
+    # Replies from different Freelancer Agent replicas are handled side by side;
+    # stage checks keep each interaction's own replies in order
+    handle_messages_concurrently=True
 )
 
-# ASI-1 LLM client for AI-generated messages
-asi_client = OpenAI(
-    base_url='https://api.asi1.ai/v1',
-    api_key=os.getenv('ASI_API_KEY'),
-)
+# ASI-1 LLM client for AI-generated messages (or a recording/replaying cassette)
+asi_client = make_asi_client()
 
 # Storage for ongoing evaluations
 evaluations = {}
 
-# Queue for new evaluation requests
-evaluation_queue = Queue()
-
-verification_queue = Queue()
 verifications = {}
 
+# Bulk evaluations: one task, many candidates sharing the same questions
+bulk_evaluations = {}
+
+# Queued evaluation, bulk evaluation and verification work, started in priority and fair-share order
+scheduler = FairScheduler()
+
+# Freelancer Agent replicas and the evaluations each one is working on
+freelancer_pool = {}
+
+# Context captured at startup so an in-loop HTTP server can dispatch work directly
+agent_context = None
+dispatch_tasks = set()
+
+# Maximum candidates of one bulk evaluation talking to the Freelancer Agent at once
+BULK_EVALUATION_CONCURRENCY = int(os.getenv('BULK_EVALUATION_CONCURRENCY', '5'))
+
+# Seconds the Freelancer Agent has to reply before the message is resent
+AGENT_REPLY_TIMEOUT = float(os.getenv('AGENT_REPLY_TIMEOUT', '60'))
+# Resends of an unanswered message before the interaction times out
+AGENT_MAX_RETRIES = int(os.getenv('AGENT_MAX_RETRIES', '2'))
+# Seconds a single LLM step may take before the interaction times out
+LLM_STAGE_TIMEOUT = float(os.getenv('LLM_STAGE_TIMEOUT', '120'))
+# Seconds a started interaction may take in total, whatever stage it is in (0 disables)
+INTERACTION_TIMEOUT = float(os.getenv('INTERACTION_TIMEOUT', '900'))
+WATCHDOG_INTERVAL = float(os.getenv('WATCHDOG_INTERVAL', '5'))
+
+# In-flight LLM calls per interaction, cancelled when the interaction is stopped
+llm_tasks = {}
+interaction_stats = {'timed_out': 0, 'cancelled': 0, 'errors': 0, 'retries': 0}
+STOP_COUNTERS = {'timeout': 'timed_out', 'cancelled': 'cancelled'}
+agent_loop = None
+
+class StageTimings:
+    """Count, total and maximum seconds per evaluation stage"""
+
+    def __init__(self):
+        self._stages = {}
+
+    def add(self, timings: dict):
+        for stage, seconds in timings.items():
+            entry = self._stages.setdefault(stage, {'count': 0, 'total': 0.0, 'max': 0.0})
+            entry['count'] += 1
+            entry['total'] += seconds
+            entry['max'] = max(entry['max'], seconds)
+
+    def snapshot(self) -> dict:
+        return {
+            stage: {
+                'count': entry['count'],
+                'avg_seconds': round(entry['total'] / entry['count'], 4),
+                'max_seconds': round(entry['max'], 4)
+            }
+            for stage, entry in list(self._stages.items())
+        }
+
+# Per-stage evaluation timings, summed over completed evaluations
+stage_timings = StageTimings()
+
+class InteractionStopped(Exception):
+    """The interaction timed out or was cancelled while its LLM call was running"""
+
+def _interaction(interaction_id: str):
+    return evaluations.get(interaction_id) or verifications.get(interaction_id)
+
+def is_active(interaction_id: str) -> bool:
+    record = _interaction(interaction_id)
+    return record is not None and record.get('status') == 'processing'
+
+def finish_record(record: dict, status: str):
+    """Set a final status and when it was reached; admission control's drain rate is based on it"""
+    record['status'] = status
+    record['finished_at'] = time.monotonic()
+
+def begin_stage(record: dict, stage: str, timeout: float, address: str = None, message=None):
+    """Start a stage that must finish before its deadline; a pending message is resent on expiry"""
+    record['stage'] = stage
+    record['stage_deadline'] = time.monotonic() + timeout
+    record['retries'] = 0
+    record['pending_message'] = (address, message) if message is not None else None
+
+def start_deadline(record: dict):
+    """Give a started interaction its overall deadline, which holds even between stages"""
+    record['deadline'] = time.monotonic() + INTERACTION_TIMEOUT if INTERACTION_TIMEOUT else None
+
+def past_deadline(record: dict, now: float) -> bool:
+    deadline = record.get('stage_deadline')
+    overall = record.get('deadline')
+    return (deadline is not None and deadline < now) or (overall is not None and overall < now)
+
+def end_stage(record: dict):
+    record['stage'] = None
+    record['stage_deadline'] = None
+    record['pending_message'] = None
+
+def register_freelancer_pool(addresses: list):
+    """Freelancer Agent replicas new evaluations are spread across"""
+    for address in addresses:
+        freelancer_pool.setdefault(str(address), set())
+
+def pick_freelancer() -> str:
+    """Replica with the fewest evaluations in progress"""
+    return min(freelancer_pool, key=lambda address: len(freelancer_pool[address]))
+
+def release_freelancer(interaction_id: str, record: dict):
+    outstanding = freelancer_pool.get(record.get('freelancer_address'))
+    if outstanding is not None:
+        outstanding.discard(interaction_id)
+
+def record_timing(record: dict, stage: str, seconds: float):
+    """Add to the time an evaluation spent in a stage"""
+    timings = record.setdefault('timings', {})
+    timings[stage] = round(timings.get(stage, 0.0) + seconds, 4)
+
+async def send_awaiting_reply(ctx: Context, interaction_id: str, address: str, message, stage: str):
+    """Send a message the Freelancer Agent must answer within AGENT_REPLY_TIMEOUT"""
+    record = evaluations[interaction_id]
+    begin_stage(record, stage, AGENT_REPLY_TIMEOUT, address, message)
+    record['sent_at'] = time.perf_counter()
+    await ctx.send(address, message)
+
+async def run_llm(interaction_id: str, stage: str, func, *args, **kwargs):
+    """Run a blocking LLM step in a worker thread, stoppable with its interaction
+
+    With a stage the call runs under that stage's deadline; without one it runs in the
+    background and whoever awaits it sets the deadline.
+    """
+    if not is_active(interaction_id):
+        raise InteractionStopped(interaction_id)
+    record = _interaction(interaction_id)
+    if stage:
+        begin_stage(record, stage, LLM_STAGE_TIMEOUT)
+    task = asyncio.ensure_future(asyncio.to_thread(func, *args, **kwargs))
+    llm_tasks.setdefault(interaction_id, set()).add(task)
+    try:
+        result = await task
+    except asyncio.CancelledError:
+        if not is_active(interaction_id):
+            raise InteractionStopped(interaction_id)
+        raise
+    finally:
+        tasks = llm_tasks.get(interaction_id)
+        if tasks is not None:
+            tasks.discard(task)
+            if not tasks:
+                llm_tasks.pop(interaction_id, None)
+    
+    if not is_active(interaction_id):
+        # Stopped while the call finished; the result is no longer wanted
+        raise InteractionStopped(interaction_id)
+    if stage:
+        end_stage(record)
+    return result
+
+async def prepare_questions(interaction_id: str, job_description: str, requirements: list) -> list:
+    """Generate an evaluation's questions while the introduction exchange is still going on"""
+    started = time.perf_counter()
+    questions = await run_llm(interaction_id, None, generate_questions, job_description, requirements)
+    record_timing(evaluations[interaction_id], 'questions', time.perf_counter() - started)
+    return questions
+
+async def refine_message(record: dict, entry, generate, *args):
+    """Swap a template message shown in the transcript for the LLM-written one once it is ready"""
+    message = await asyncio.to_thread(generate, *args)
+    if record.get('status') == 'failed':
+        return
+    if record['conversation'].update(entry, message):
+        invalidate_snapshot(record)
+
+def _retrieve_exception(task: asyncio.Task):
+    # A stopped interaction may never await its speculative work
+    if not task.cancelled():
+        task.exception()
+
 def generate_introduction_message(job_title: str) -> str:
     """Use ASI-1 LLM to generate introduction message"""
     try:
-        prompt = f"""
+        system_prompt = "You are a Client Agent. Write a professional introduction."
+        prompt = fit_prompt('introduction', """
         You are a Client Agent evaluating a freelancer for a position: {job_title}
         
         Write a brief introduction to the Freelancer Agent explaining:
@@ -55,12 +241,13 @@ def generate_introduction_message(job_title: str) -> str:
         3. They need to respond with their analysis of the user profile  
         
         Be professional and conversational. Keep it 2-3 sentences.
-        """
+        """, system=system_prompt, job_title=truncate_text(job_title, 30))
         
-        response = asi_client.chat.completions.create(
-            model="asi1-mini",
+        response = complete(
+            asi_client,
+            'introduction',
             messages=[
-                {"role": "system", "content": "You are a Client Agent. Write a professional introduction."},
+                {"role": "system", "content": system_prompt},
                 {"role": "user", "content": prompt},
             ],
             max_tokens=100,
@@ -70,21 +257,18 @@ def generate_introduction_message(job_title: str) -> str:
     except Exception as e:
         return f"Hello, I am going to evaluate if your freelancer has the ability to do this task. I will ask you questions, and you need to respond with your analysis of the user profile."
 
-async def verify_submission(ctx: Context, task_data: dict, submission_data: dict, interaction_id: str):
+async def verify_submission(ctx: Context, task_data: dict, submission_data: dict, interaction_id: str, cache_key: str = None):
     """Verify submitted work against task requirements"""
     try:
-        submission_text = ""
-        for field in submission_data.get('fields', []):
-            submission_text += f"\n{field['label']}:\n{field['content']}\n"
-        
-        prompt = f"""
-        Task Description: {task_data['description']}
+        system_prompt = "You are a supportive reviewer evaluating freelancer work. Be lenient and encouraging. Approve if reasonable effort is shown. Only reject if completely off-topic."
+        prompt = fit_prompt('verification', """
+        Task Description: {description}
         
         Task Requirements:
-        {chr(10).join(f"- {req}" for req in task_data['requirements'])}
+        {requirements}
         
         Submitted Work:
-        {submission_text}
+        {submission}
         
         You are evaluating a freelancer's work submission. Be LENIENT and SUPPORTIVE in your evaluation.
         
@@ -99,22 +283,25 @@ async def verify_submission(ctx: Context, task_data: dict, submission_data: dict
         2. "REJECTED" only if completely off-topic or no effort shown
         
         Then provide brief, ENCOURAGING feedback.
-        """
-        
-        verifications[interaction_id]['conversation'].append({
-            'id': str(uuid4()),
-            'sender': 'client_agent',
-            'message': 'Analyzing submitted work against task requirements...',
-            'timestamp': datetime.now().isoformat(),
-            'isThinking': True
-        })
+        """,
+            system=system_prompt,
+            description=compact_description(task_data['description']),
+            requirements=chr(10).join(f"- {req}" for req in compact_requirements(task_data['requirements'])),
+            submission=compact_submission(submission_data)
+        )
+        
+        verifications[interaction_id]['conversation'].think('client_agent', 'Analyzing submitted work against task requirements...')
         
         await asyncio.sleep(1)
         
-        response = asi_client.chat.completions.create(
-            model="asi1-mini",
+        response = await run_llm(
+            interaction_id,
+            'verification',
+            complete,
+            asi_client,
+            'verification',
             messages=[
-                {"role": "system", "content": "You are a supportive reviewer evaluating freelancer work. Be lenient and encouraging. Approve if reasonable effort is shown. Only reject if completely off-topic."},
+                {"role": "system", "content": system_prompt},
                 {"role": "user", "content": prompt},
             ],
             max_tokens=200,
@@ -134,106 +321,319 @@ async def verify_submission(ctx: Context, task_data: dict, submission_data: dict
             if not feedback:
                 feedback = "Great work! The submission meets the task requirements."
         
-        verifications[interaction_id]['conversation'][-1] = {
-            'id': str(uuid4()),
-            'sender': 'client_agent',
-            'message': f"{decision}: {feedback}",
-            'timestamp': datetime.now().isoformat(),
-            'isThinking': False
-        }
+        verifications[interaction_id]['conversation'].replace_last('client_agent', f"{decision}: {feedback}")
         
-        verifications[interaction_id]['status'] = 'completed'
+        finish_record(verifications[interaction_id], 'completed')
         verifications[interaction_id]['decision'] = decision
         verifications[interaction_id]['feedback'] = feedback
         
+        if cache_key:
+            verification_cache.put(cache_key, decision, feedback)
+        
         ctx.logger.info(f"Verification decision: {decision}")
         
+    except InteractionStopped:
+        ctx.logger.info(f"Verification {interaction_id} stopped")
     except Exception as e:
         ctx.logger.error(f"Verification error: {e}")
-        verifications[interaction_id]['status'] = 'error'
-        verifications[interaction_id]['conversation'].append({
-            'id': str(uuid4()),
-            'sender': 'system',
-            'message': 'Error during verification. Please try again.',
-            'timestamp': datetime.now().isoformat(),
-            'isThinking': False
-        })
+        finish_record(verifications[interaction_id], 'error')
+        verifications[interaction_id]['conversation'].append('system', 'Error during verification. Please try again.')
 
 # Create protocol for evaluation
 evaluation_protocol = Protocol("Evaluation")
 
+async def start_evaluation(ctx: Context, eval_data: dict, intro_message: str = None, questions: list = None, batch_id: str = None):
+    """Open the conversation with the Freelancer Agent for one candidate"""
+    interaction_id = eval_data['interaction_id']
+    
+    # The whole conversation stays on one replica, which keeps the profile it was sent
+    freelancer_address = eval_data.get('freelancer_address') or pick_freelancer()
+    if freelancer_address in freelancer_pool:
+        freelancer_pool[freelancer_address].add(interaction_id)
+    
+    # Store evaluation data
+    evaluations[interaction_id] = {
+        'job_title': eval_data['job_title'],
+        'job_description': eval_data['job_description'],
+        'requirements': eval_data['requirements'],
+        'profile_data': eval_data['profile_data'],
+        'freelancer_address': freelancer_address,
+        'conversation': Transcript(),
+        'status': 'processing',
+        'started_at': time.perf_counter()
+    }
+    start_deadline(evaluations[interaction_id])
+    
+    if questions:
+        # Questions shared across a bulk evaluation
+        evaluations[interaction_id]['questions'] = questions
+    else:
+        # Questions and the profile transfer don't depend on the acknowledgment, so
+        # they run alongside the introduction exchange instead of after it
+        questions_task = asyncio.ensure_future(
+            prepare_questions(interaction_id, eval_data['job_description'], eval_data['requirements'])
+        )
+        questions_task.add_done_callback(_retrieve_exception)
+        evaluations[interaction_id]['questions_task'] = questions_task
+    
+    if batch_id:
+        evaluations[interaction_id]['batch_id'] = batch_id
+    
+    ctx.logger.info("Sending profile data to Freelancer Agent...")
+    await ctx.send(
+        freelancer_address,
+        ProfileDataMessage(
+            profile_data=eval_data['profile_data'],
+            interaction_id=interaction_id
+        )
+    )
+    
+    # Add thinking state
+    evaluations[interaction_id]['conversation'].think('client_agent')
+    
+    refine_intro = False
+    if intro_message is None and AGENT_MESSAGE_MODE != 'llm':
+        intro_message = introduction_template(eval_data['job_title'], interaction_id)
+        refine_intro = AGENT_MESSAGE_MODE == 'background'
+    elif intro_message is None:
+        ctx.logger.info("Generating introduction message...")
+        started = time.perf_counter()
+        try:
+            intro_message = await run_llm(interaction_id, 'introduction', generate_introduction_message, eval_data['job_title'])
+        except InteractionStopped:
+            return
+        record_timing(evaluations[interaction_id], 'introduction', time.perf_counter() - started)
+    
+    # Small delay to show thinking
+    await asyncio.sleep(1)
+    if not is_active(interaction_id):
+        return
+    
+    # Replace with actual message
+    intro_entry = evaluations[interaction_id]['conversation'].replace_last('client_agent', intro_message)
+    if refine_intro:
+        _spawn(refine_message(evaluations[interaction_id], intro_entry, generate_introduction_message, eval_data['job_title']))
+    
+    ctx.logger.info(f"Sending introduction to Freelancer Agent: {intro_message}")
+    
+    # Send introduction to Freelancer Agent
+    await send_awaiting_reply(
+        ctx,
+        interaction_id,
+        freelancer_address,
+        EvaluationIntroduction(
+            job_title=eval_data['job_title'],
+            message=intro_message,
+            interaction_id=interaction_id
+        ),
+        'awaiting_acknowledgment'
+    )
+
+async def start_bulk_evaluation(ctx: Context, batch: dict):
+    """Generate the introduction and questions once, then start the first candidates"""
+    ctx.logger.info(f"Processing bulk evaluation for: {batch['job_title']} ({len(batch['pending'])} candidates)")
+    
+    batch['status'] = 'processing'
+    if AGENT_MESSAGE_MODE == 'llm':
+        batch['intro_message'], batch['questions'] = await asyncio.gather(
+            asyncio.to_thread(generate_introduction_message, batch['job_title']),
+            asyncio.to_thread(generate_questions, batch['job_description'], batch['requirements'])
+        )
+    else:
+        batch['intro_message'] = introduction_template(batch['job_title'], batch['batch_id'])
+        if AGENT_MESSAGE_MODE == 'background':
+            # Candidates started after the LLM introduction is ready get it instead of the template
+            _spawn(refine_bulk_introduction(batch))
+        batch['questions'] = await asyncio.to_thread(generate_questions, batch['job_description'], batch['requirements'])
+    
+    await fill_bulk_evaluation(ctx, batch['batch_id'])
+
+async def refine_bulk_introduction(batch: dict):
+    batch['intro_message'] = await asyncio.to_thread(generate_introduction_message, batch['job_title'])
+
+async def fill_bulk_evaluation(ctx: Context, batch_id: str):
+    """Schedule queued candidates of a batch until the batch's concurrency limit is reached"""
+    batch = bulk_evaluations.get(batch_id)
+    if not batch or batch['status'] != 'processing':
+        return
+    
+    submitted = False
+    while batch['pending'] and batch['active'] < BULK_EVALUATION_CONCURRENCY:
+        candidate = batch['pending'].pop(0)
+        batch['active'] += 1
+        scheduler.submit(
+            'evaluation',
+            candidate['interaction_id'],
+            batch['task_id'],
+            {'kind': 'evaluation', 'eval_data': candidate, 'batch_id': batch_id}
+        )
+        submitted = True
+    
+    if submitted:
+        await check_queues(ctx)
+    elif batch['active'] == 0:
+        batch['status'] = 'completed'
+        ctx.logger.info(f"Bulk evaluation {batch_id} completed")
+
+async def finish_bulk_candidate(ctx: Context, batch_id: str):
+    """Free a concurrency slot of the batch and start the next candidate"""
+    batch = bulk_evaluations.get(batch_id)
+    if not batch:
+        return
+    
+    batch['active'] -= 1
+    await fill_bulk_evaluation(ctx, batch_id)
+
+def release_interaction(record: dict):
+    """Drop everything a stopped interaction no longer needs beyond its conversation"""
+    for key in ('questions', 'questions_task', 'answers', 'job_description', 'requirements', 'pending_message', 'acknowledgment_entry', 'acknowledgment_update'):
+        record.pop(key, None)
+    profile = record.get('profile_data')
+    if profile:
+        record['profile_data'] = {key: profile[key] for key in ('name', 'wallet') if key in profile}
+
+async def close_interaction(ctx: Context, interaction_id: str, record: dict):
+    """Let the Freelancer Agent drop its state and hand the freed slots to queued work"""
+    if record.get('freelancer_address'):
+        await ctx.send(record['freelancer_address'], EvaluationClosed(interaction_id=interaction_id))
+    if record.get('batch_id'):
+        await finish_bulk_candidate(ctx, record['batch_id'])
+    await check_queues(ctx)
+
+def _spawn(coroutine):
+    """Run a coroutine on the Bureau's loop without awaiting it; must be called on that loop"""
+    task = asyncio.get_running_loop().create_task(coroutine)
+    dispatch_tasks.add(task)
+    task.add_done_callback(dispatch_tasks.discard)
+
+def _stop_in_loop(interaction_id: str, record: dict):
+    release_freelancer(interaction_id, record)
+    for task in llm_tasks.pop(interaction_id, ()):
+        task.cancel()
+    if agent_context is not None:
+        _spawn(close_interaction(agent_context, interaction_id, record))
+
+def stop_interaction(interaction_id: str, reason: str, message: str) -> bool:
+    """Fail a processing interaction, cancel its LLM calls and free its state; callable from any thread"""
+    record = _interaction(interaction_id)
+    if record is None or record.get('status') != 'processing':
+        return False
+    
+    finish_record(record, 'failed')
+    record['failure_reason'] = reason
+    end_stage(record)
+    record['conversation'].conclude('system', message)
+    release_interaction(record)
+    scheduler.release(interaction_id)
+    interaction_stats[STOP_COUNTERS.get(reason, 'errors')] += 1
+    
+    if agent_loop is not None:
+        agent_loop.call_soon_threadsafe(_stop_in_loop, interaction_id, record)
+    return True
+
+def stop_on_error(handler):
+    """Fail the interaction of a message handler that raises, instead of leaving it holding its slot"""
+    @functools.wraps(handler)
+    async def wrapper(ctx: Context, sender: str, msg):
+        try:
+            await handler(ctx, sender, msg)
+        except Exception as e:
+            ctx.logger.error(f"Evaluation {msg.interaction_id} failed: {e}")
+            if not stop_interaction(msg.interaction_id, 'error', 'Evaluation failed. Please try again.'):
+                # Raised after the evaluation completed, possibly before its slot was freed
+                scheduler.release(msg.interaction_id)
+    return wrapper
+
+async def run_job(ctx: Context, job: dict):
+    """Run one scheduled job; an evaluation keeps its slot until the conversation ends"""
+    if job['kind'] == 'verification':
+        interaction_id = job['interaction_id']
+        try:
+            if is_active(interaction_id):
+                start_deadline(verifications[interaction_id])
+                ctx.logger.info(f"Processing verification request: {interaction_id}")
+                await verify_submission(ctx, job['task_data'], job['submission_data'], interaction_id, job.get('cache_key'))
+        finally:
+            scheduler.release(interaction_id)
+        await check_queues(ctx)
+    
+    elif job['kind'] == 'bulk':
+        batch_id = job['batch_id']
+        try:
+            await start_bulk_evaluation(ctx, bulk_evaluations[batch_id])
+        finally:
+            scheduler.release(batch_id)
+        await check_queues(ctx)
+    
+    else:
+        eval_data = job['eval_data']
+        ctx.logger.info(f"Processing evaluation for: {eval_data['job_title']}")
+        batch = bulk_evaluations.get(job.get('batch_id'), {})
+        try:
+            await start_evaluation(
+                ctx,
+                eval_data,
+                intro_message=batch.get('intro_message'),
+                questions=batch.get('questions'),
+                batch_id=job.get('batch_id')
+            )
+        except Exception as e:
+            ctx.logger.error(f"Could not start evaluation {eval_data['interaction_id']}: {e}")
+            stop_interaction(eval_data['interaction_id'], 'error', 'Evaluation could not be started. Please try again.')
+
 @client_agent.on_interval(period=2.0)
 async def check_queues(ctx: Context):
-    """Check for new evaluation and verification requests periodically"""
-    # Check evaluation queue
-    if not evaluation_queue.empty():
-        eval_data = evaluation_queue.get()
-        
-        ctx.logger.info(f"Processing evaluation for: {eval_data['job_title']}")
-        
-        interaction_id = eval_data['interaction_id']
-        
-        # Store evaluation data
-        evaluations[interaction_id] = {
-            'job_title': eval_data['job_title'],
-            'job_description': eval_data['job_description'],
-            'requirements': eval_data['requirements'],
-            'profile_data': eval_data['profile_data'],
-            'conversation': [],
-            'status': 'processing'
-        }
-        
-        ctx.logger.info("Generating introduction message...")
-        intro_message = generate_introduction_message(eval_data['job_title'])
-        
-        # Add thinking state
-        evaluations[interaction_id]['conversation'].append({
-            'id': str(uuid4()),
-            'sender': 'client_agent',
-            'message': '',
-            'timestamp': datetime.now().isoformat(),
-            'isThinking': True
-        })
+    """Start queued work in scheduler order while concurrency slots are free"""
+    while True:
+        scheduled = scheduler.next_job()
+        if scheduled is None:
+            break
         
-        # Small delay to show thinking
-        await asyncio.sleep(1)
+        _, job = scheduled
+        _spawn(run_job(ctx, job))
+
+@client_agent.on_interval(period=WATCHDOG_INTERVAL)
+async def watchdog(ctx: Context):
+    """Resend unanswered messages and time out interactions stuck past their stage or overall deadline"""
+    now = time.monotonic()
+    for interaction_id, record in list(evaluations.items()) + list(verifications.items()):
+        if record.get('status') != 'processing':
+            continue
         
-        # Replace with actual message
-        evaluations[interaction_id]['conversation'][-1] = {
-            'id': str(uuid4()),
-            'sender': 'client_agent',
-            'message': intro_message,
-            'timestamp': datetime.now().isoformat(),
-            'isThinking': False
-        }
+        overall = record.get('deadline')
+        if overall is not None and overall < now:
+            # Also catches interactions left between stages, which have no stage deadline
+            ctx.logger.warning(f"Interaction {interaction_id} ran past INTERACTION_TIMEOUT in stage {record.get('stage')}")
+            stop_interaction(interaction_id, 'timeout', "This took too long and was stopped. Please try again.")
+            continue
         
-        ctx.logger.info(f"Sending introduction to Freelancer Agent: {intro_message}")
+        deadline = record.get('stage_deadline')
+        if deadline is None or deadline > now:
+            continue
         
-        # Send introduction to Freelancer Agent
-        await ctx.send(
-            eval_data['freelancer_address'],
-            EvaluationIntroduction(
-                job_title=eval_data['job_title'],
-                message=intro_message,
-                interaction_id=interaction_id
-            )
-        )
-    
-    # Check verification queue
-    if not verification_queue.empty():
-        request = verification_queue.get()
-        interaction_id = request['interaction_id']
+        pending = record.get('pending_message')
+        if pending and record['retries'] < AGENT_MAX_RETRIES:
+            record['retries'] += 1
+            record['stage_deadline'] = now + AGENT_REPLY_TIMEOUT
+            interaction_stats['retries'] += 1
+            ctx.logger.warning(f"No reply for {interaction_id} ({record['stage']}), resending ({record['retries']}/{AGENT_MAX_RETRIES})")
+            await ctx.send(*pending)
+            continue
         
-        ctx.logger.info(f"Processing verification request: {interaction_id}")
-        
-        await verify_submission(ctx, request['task_data'], request['submission_data'], interaction_id)
+        ctx.logger.warning(f"Interaction {interaction_id} timed out in stage {record['stage']}")
+        if pending:
+            message = "The Freelancer Agent did not reply in time. Please try again."
+        else:
+            message = "The analysis took too long and was stopped. Please try again."
+        stop_interaction(interaction_id, 'timeout', message)
 
 def generate_questions(job_description: str, requirements: list) -> list:
     """Generate questions based on job description and requirements using ASI-1"""
     try:
-        prompt = f"""
-        Job Description: {job_description}
-        Requirements: {', '.join(requirements)}
+        system_prompt = "You are a Client Agent. Generate questions ONLY about the specific requirements listed. Do not add extra questions."
+        prompt = fit_prompt('questions', """
+        Job Description: {description}
+        Requirements: {requirements}
         
         Generate YES/NO questions ONLY about the specific skills, technologies, and qualifications listed in the requirements above.
         
@@ -251,12 +651,17 @@ def generate_questions(job_description: str, requirements: list) -> list:
         Format: "Do you have experience in [exact skill from requirement]?"
         
         Return ONLY the questions, one per line, numbered.
-        """
+        """,
+            system=system_prompt,
+            description=compact_description(job_description),
+            requirements=', '.join(compact_requirements(requirements))
+        )
         
-        response = asi_client.chat.completions.create(
-            model="asi1-mini",
+        response = complete(
+            asi_client,
+            'questions',
             messages=[
-                {"role": "system", "content": "You are a Client Agent. Generate questions ONLY about the specific requirements listed. Do not add extra questions."},
+                {"role": "system", "content": system_prompt},
                 {"role": "user", "content": prompt},
             ],
             max_tokens=200,
@@ -269,259 +674,503 @@ def generate_questions(job_description: str, requirements: list) -> list:
         return [f"Do you have experience with {req}?" for req in requirements[:3]]
 
 @evaluation_protocol.on_message(model=IntroductionAcknowledgment)
+@stop_on_error
 async def handle_acknowledgment(ctx: Context, sender: str, msg: IntroductionAcknowledgment):
     """Handle acknowledgment from Freelancer Agent"""
     ctx.logger.info(f"Received acknowledgment: {msg.message}")
     
-    if msg.interaction_id in evaluations:
-        # Add Freelancer's response to conversation
-        evaluations[msg.interaction_id]['conversation'].append({
-            'id': str(uuid4()),
-            'sender': 'freelancer_agent',
-            'message': msg.message,
-            'timestamp': datetime.now().isoformat(),
-            'isThinking': False
-        })
+    evaluation = evaluations.get(msg.interaction_id)
+    if (
+        not evaluation
+        or evaluation['status'] != 'processing'
+        or evaluation.get('stage') != 'awaiting_acknowledgment'
+        or sender != evaluation['freelancer_address']
+    ):
+        # Stopped interaction, a duplicate reply to a resent introduction, or the wrong replica
+        ctx.logger.info(f"Ignoring acknowledgment for {msg.interaction_id}")
+        return
+    end_stage(evaluation)
+    record_timing(evaluation, 'acknowledgment', time.perf_counter() - evaluation['sent_at'])
+    
+    # Add Freelancer's response to conversation, or its LLM-written version if that came first
+    evaluation['acknowledgment_entry'] = evaluation['conversation'].append(
+        'freelancer_agent',
+        evaluation.pop('acknowledgment_update', None) or msg.message
+    )
+    
+    await asyncio.sleep(0.5)
+    if not is_active(msg.interaction_id):
+        return
+    
+    # Questions have been generating since the evaluation started, unless a bulk evaluation shared its own
+    questions = evaluation.get('questions')
+    if not questions:
+        ctx.logger.info("Waiting for generated questions...")
+        begin_stage(evaluation, 'questions', LLM_STAGE_TIMEOUT)
+        started = time.perf_counter()
+        try:
+            questions = await evaluation.pop('questions_task')
+        except InteractionStopped:
+            return
+        end_stage(evaluation)
+        record_timing(evaluation, 'questions_wait', time.perf_counter() - started)
+        evaluation['questions'] = questions
+    if not questions:
+        stop_interaction(msg.interaction_id, 'error', 'No questions could be generated for this task. Please check its requirements.')
+        return
+    evaluation['current_question_index'] = 0
+    evaluation['answers'] = []
+    
+    # Show thinking state for Client Agent
+    evaluation['conversation'].think('client_agent')
+    
+    await asyncio.sleep(0.5)
+    if not is_active(msg.interaction_id):
+        return
+    
+    # Send first question
+    first_question = questions[0]
+    ctx.logger.info(f"Asking question 1/{len(questions)}: {first_question}")
+    
+    evaluation['conversation'].replace_last('client_agent', first_question)
+    
+    await send_awaiting_reply(
+        ctx,
+        msg.interaction_id,
+        sender,
+        QuestionMessage(
+            question=first_question,
+            interaction_id=msg.interaction_id,
+            question_number=0
+        ),
+        'awaiting_answer'
+    )
+
+@evaluation_protocol.on_message(model=AcknowledgmentUpdate)
+async def handle_acknowledgment_update(ctx: Context, sender: str, msg: AcknowledgmentUpdate):
+    """Swap the Freelancer Agent's template acknowledgment for its LLM-written one"""
+    evaluation = evaluations.get(msg.interaction_id)
+    if not evaluation or evaluation['status'] == 'failed' or sender != evaluation['freelancer_address']:
+        return
+    
+    entry = evaluation.get('acknowledgment_entry')
+    if entry is None:
+        # Handled before the acknowledgment itself
+        evaluation['acknowledgment_update'] = msg.message
+    elif evaluation['conversation'].update(entry, msg.message):
+        invalidate_snapshot(evaluation)
+
+@evaluation_protocol.on_message(model=QuestionResponse)
+@stop_on_error
+async def handle_question_response(ctx: Context, sender: str, msg: QuestionResponse):
+    """Handle response from Freelancer Agent"""
+    ctx.logger.info(f"Received answer: {msg.answer[:50]}...")
+    
+    evaluation = evaluations.get(msg.interaction_id)
+    if (
+        not evaluation
+        or evaluation['status'] != 'processing'
+        or evaluation.get('stage') != 'awaiting_answer'
+        or msg.question_number != evaluation['current_question_index']
+        or sender != evaluation['freelancer_address']
+    ):
+        # Stopped interaction, a late or duplicate answer to a resent question, or the wrong replica
+        ctx.logger.info(f"Ignoring answer for {msg.interaction_id}")
+        return
+    end_stage(evaluation)
+    record_timing(evaluation, 'answers', time.perf_counter() - evaluation['sent_at'])
+    
+    # Add Freelancer's answer to conversation
+    evaluation['conversation'].append('freelancer_agent', msg.answer)
+    
+    evaluation['answers'].append(msg.answer)
+    evaluation['current_question_index'] += 1
+    
+    await asyncio.sleep(0.5)
+    if not is_active(msg.interaction_id):
+        return
+    
+    # Check if more questions to ask
+    current_index = evaluation['current_question_index']
+    questions = evaluation['questions']
+    
+    if current_index < len(questions):
+        # Show thinking state
+        evaluation['conversation'].think('client_agent')
         
         await asyncio.sleep(0.5)
+        if not is_active(msg.interaction_id):
+            return
         
-        # Generate questions
-        ctx.logger.info("Analyzing job requirements and generating questions...")
-        job_description = evaluations[msg.interaction_id]['job_description']
-        requirements = evaluations[msg.interaction_id]['requirements']
+        # Ask next question
+        next_question = questions[current_index]
+        ctx.logger.info(f"Asking question {current_index + 1}/{len(questions)}: {next_question}")
         
-        questions = generate_questions(job_description, requirements)
-        evaluations[msg.interaction_id]['questions'] = questions
-        evaluations[msg.interaction_id]['current_question_index'] = 0
-        evaluations[msg.interaction_id]['answers'] = []
+        evaluation['conversation'].replace_last('client_agent', next_question)
         
-        # Send profile data to Freelancer Agent first
-        ctx.logger.info("Sending profile data to Freelancer Agent...")
-        await ctx.send(
+        await send_awaiting_reply(
+            ctx,
+            msg.interaction_id,
             sender,
-            ProfileDataMessage(
-                profile_data=evaluations[msg.interaction_id]['profile_data'],
-                interaction_id=msg.interaction_id
-            )
+            QuestionMessage(
+                question=next_question,
+                interaction_id=msg.interaction_id,
+                question_number=current_index
+            ),
+            'awaiting_answer'
         )
+    else:
+        # All questions answered - make final decision
+        ctx.logger.info(f"All questions answered for {msg.interaction_id}. Making final decision...")
         
-        await asyncio.sleep(0.3)
-        
-        # Show thinking state for Client Agent
-        evaluations[msg.interaction_id]['conversation'].append({
-            'id': str(uuid4()),
-            'sender': 'client_agent',
-            'message': '',
-            'timestamp': datetime.now().isoformat(),
-            'isThinking': True
-        })
-        
-        await asyncio.sleep(0.5)
+        # Show thinking state
+        evaluation['conversation'].think('client_agent')
         
-        # Send first question
-        first_question = questions[0]
-        ctx.logger.info(f"Asking question 1/{len(questions)}: {first_question}")
+        await asyncio.sleep(1)
+        if not is_active(msg.interaction_id):
+            return
         
-        evaluations[msg.interaction_id]['conversation'][-1] = {
-            'id': str(uuid4()),
-            'sender': 'client_agent',
-            'message': first_question,
-            'timestamp': datetime.now().isoformat(),
-            'isThinking': False
-        }
+        # Analyze all answers
+        questions = evaluation['questions']
+        answers = evaluation['answers']
         
-        await ctx.send(
-            sender,
-            QuestionMessage(
-                question=first_question,
-                interaction_id=msg.interaction_id
-            )
-        )
-
-@evaluation_protocol.on_message(model=QuestionResponse)
-async def handle_question_response(ctx: Context, sender: str, msg: QuestionResponse):
-    """Handle response from Freelancer Agent"""
-    ctx.logger.info(f"Received answer: {msg.answer[:50]}...")
-    
-    if msg.interaction_id in evaluations:
-        # Add Freelancer's answer to conversation
-        evaluations[msg.interaction_id]['conversation'].append({
-            'id': str(uuid4()),
-            'sender': 'freelancer_agent',
-            'message': msg.answer,
-            'timestamp': datetime.now().isoformat(),
-            'isThinking': False
-        })
+        # Build conversation history for analysis
+        qa_history = "\n".join([f"Q: {compact_answer(q)}\nA: {compact_answer(a)}" for q, a in zip(questions, answers)])
         
-        evaluations[msg.interaction_id]['answers'].append(msg.answer)
-        evaluations[msg.interaction_id]['current_question_index'] += 1
+        # Count positive vs negative answers
+        positive_answers = sum(1 for a in answers if 'yes' in a.lower() and 'no' not in a.lower())
+        negative_answers = sum(1 for a in answers if 'no' in a.lower() or "doesn't" in a.lower() or "don't" in a.lower())
         
-        await asyncio.sleep(0.5)
+        ctx.logger.info(f"Positive answers: {positive_answers}/{len(answers)}, Negative: {negative_answers}/{len(answers)}")
         
-        # Check if more questions to ask
-        current_index = evaluations[msg.interaction_id]['current_question_index']
-        questions = evaluations[msg.interaction_id]['questions']
-        
-        if current_index < len(questions):
-            # Show thinking state
-            evaluations[msg.interaction_id]['conversation'].append({
-                'id': str(uuid4()),
-                'sender': 'client_agent',
-                'message': '',
-                'timestamp': datetime.now().isoformat(),
-                'isThinking': True
-            })
+        decision_started = time.perf_counter()
+        try:
+            system_prompt = "You are evaluating a candidate. Approve ONLY if all answers show the candidate has the required skills. If you see 'Yes' in all answers, approve. If you see any 'No', reject."
+            decision_prompt = fit_prompt('decision', """
+            I asked the Freelancer Agent these questions about the candidate's qualifications:
             
-            await asyncio.sleep(0.5)
+            {qa_history}
             
-            # Ask next question
-            next_question = questions[current_index]
-            ctx.logger.info(f"Asking question {current_index + 1}/{len(questions)}: {next_question}")
+            Review each answer carefully. Count how many answers are "Yes" (candidate has the skill) vs "No" (candidate lacks the skill).
             
-            evaluations[msg.interaction_id]['conversation'][-1] = {
-                'id': str(uuid4()),
-                'sender': 'client_agent',
-                'message': next_question,
-                'timestamp': datetime.now().isoformat(),
-                'isThinking': False
-            }
-            
-            await ctx.send(
-                sender,
-                QuestionMessage(
-                    question=next_question,
-                    interaction_id=msg.interaction_id
-                )
-            )
-        else:
-            # All questions answered - make final decision
-            ctx.logger.info(f"All questions answered for {msg.interaction_id}. Making final decision...")
-            
-            # Show thinking state
-            evaluations[msg.interaction_id]['conversation'].append({
-                'id': str(uuid4()),
-                'sender': 'client_agent',
-                'message': '',
-                'timestamp': datetime.now().isoformat(),
-                'isThinking': True
-            })
-            
-            await asyncio.sleep(1)
-            
-            # Analyze all answers
-            questions = evaluations[msg.interaction_id]['questions']
-            answers = evaluations[msg.interaction_id]['answers']
+            Based ONLY on the answers above:
+            - If ALL answers are "Yes" (or positive), respond with: "APPROVED"
+            - If ANY answer is "No" (or negative), respond with: "NOT APPROVED"
             
-            # Build conversation history for analysis
-            qa_history = "\n".join([f"Q: {q}\nA: {a}" for q, a in zip(questions, answers)])
+            Then explain your decision briefly.
+            """, system=system_prompt, qa_history=qa_history)
             
-            # Count positive vs negative answers
-            positive_answers = sum(1 for a in answers if 'yes' in a.lower() and 'no' not in a.lower())
-            negative_answers = sum(1 for a in answers if 'no' in a.lower() or "doesn't" in a.lower() or "don't" in a.lower())
+            response = await run_llm(
+                msg.interaction_id,
+                'decision',
+                complete,
+                asi_client,
+                'decision',
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": decision_prompt},
+                ],
+                max_tokens=150,
+            )
             
-            ctx.logger.info(f"Positive answers: {positive_answers}/{len(answers)}, Negative: {negative_answers}/{len(answers)}")
+            decision_text = str(response.choices[0].message.content)
             
-            try:
-                decision_prompt = f"""
-                I asked the Freelancer Agent these questions about the candidate's qualifications:
-                
-                {qa_history}
-                
-                Review each answer carefully. Count how many answers are "Yes" (candidate has the skill) vs "No" (candidate lacks the skill).
-                
-                Based ONLY on the answers above:
-                - If ALL answers are "Yes" (or positive), respond with: "APPROVED"
-                - If ANY answer is "No" (or negative), respond with: "NOT APPROVED"
-                
-                Then explain your decision briefly.
-                """
-                
-                response = asi_client.chat.completions.create(
-                    model="asi1-mini",
-                    messages=[
-                        {"role": "system", "content": "You are evaluating a candidate. Approve ONLY if all answers show the candidate has the required skills. If you see 'Yes' in all answers, approve. If you see any 'No', reject."},
-                        {"role": "user", "content": decision_prompt},
-                    ],
-                    max_tokens=150,
-                )
-                
-                decision_text = str(response.choices[0].message.content)
-                
-                # Simple logic: if all answers are positive, approve
-                if positive_answers == len(answers) and negative_answers == 0:
-                    decision = 'APPROVED'
-                    message = f"Your freelancer fits the task well. All required skills are confirmed."
-                elif 'APPROVED' in decision_text.upper() and 'NOT APPROVED' not in decision_text.upper():
-                    decision = 'APPROVED'
-                    message = f"Your freelancer fits the task well. {decision_text}"
-                else:
-                    decision = 'NOT APPROVED'
-                    missing_skills = [q for q, a in zip(questions, answers) if 'no' in a.lower() or "doesn't" in a.lower() or "don't" in a.lower()]
-                    if missing_skills:
-                        message = f"Sorry, your freelancer doesn't match the job requirement. They don't have the ability for tasks like: {', '.join([q.replace('Do you have experience in ', '').replace('Do you know how to ', '').replace('?', '') for q in missing_skills[:3]])}."
-                    else:
-                        message = f"Sorry, your freelancer doesn't match the job requirement. {decision_text}"
-                
-            except Exception as e:
-                ctx.logger.error(f"Decision error: {e}")
-                # Fallback to simple logic
-                if positive_answers == len(answers) and negative_answers == 0:
-                    decision = 'APPROVED'
-                    message = "Your freelancer fits the task well. All required skills are confirmed."
+            # Simple logic: if all answers are positive, approve
+            if positive_answers == len(answers) and negative_answers == 0:
+                decision = 'APPROVED'
+                message = f"Your freelancer fits the task well. All required skills are confirmed."
+            elif 'APPROVED' in decision_text.upper() and 'NOT APPROVED' not in decision_text.upper():
+                decision = 'APPROVED'
+                message = f"Your freelancer fits the task well. {decision_text}"
+            else:
+                decision = 'NOT APPROVED'
+                missing_skills = [q for q, a in zip(questions, answers) if 'no' in a.lower() or "doesn't" in a.lower() or "don't" in a.lower()]
+                if missing_skills:
+                    message = f"Sorry, your freelancer doesn't match the job requirement. They don't have the ability for tasks like: {', '.join([q.replace('Do you have experience in ', '').replace('Do you know how to ', '').replace('?', '') for q in missing_skills[:3]])}."
                 else:
-                    decision = 'NOT APPROVED'
-                    message = "Unable to complete evaluation properly."
-            
-            # Update conversation with decision
-            evaluations[msg.interaction_id]['conversation'][-1] = {
-                'id': str(uuid4()),
-                'sender': 'client_agent',
-                'message': message,
-                'timestamp': datetime.now().isoformat(),
-                'isThinking': False
-            }
-            
-            evaluations[msg.interaction_id]['status'] = 'completed'
-            evaluations[msg.interaction_id]['decision'] = decision
+                    message = f"Sorry, your freelancer doesn't match the job requirement. {decision_text}"
             
-            ctx.logger.info(f"Final decision: {decision}")
+        except InteractionStopped:
+            return
+        except Exception as e:
+            ctx.logger.error(f"Decision error: {e}")
+            # Fallback to simple logic
+            if positive_answers == len(answers) and negative_answers == 0:
+                decision = 'APPROVED'
+                message = "Your freelancer fits the task well. All required skills are confirmed."
+            else:
+                decision = 'NOT APPROVED'
+                message = "Unable to complete evaluation properly."
+        
+        record_timing(evaluation, 'decision', time.perf_counter() - decision_started)
+        
+        # Update conversation with decision
+        evaluation['conversation'].replace_last('client_agent', message)
+        
+        finish_record(evaluation, 'completed')
+        evaluation['decision'] = decision
+        evaluation['score'] = round(positive_answers / len(questions), 4) if questions else 0.0
+        record_timing(evaluation, 'total', time.perf_counter() - evaluation['started_at'])
+        stage_timings.add(evaluation['timings'])
+        
+        ctx.logger.info(f"Final decision: {decision}")
+        
+        await ctx.send(sender, EvaluationClosed(interaction_id=msg.interaction_id))
+        
+        scheduler.release(msg.interaction_id)
+        release_freelancer(msg.interaction_id, evaluation)
+        batch_id = evaluation.get('batch_id')
+        if batch_id:
+            await finish_bulk_candidate(ctx, batch_id)
+        await check_queues(ctx)
 
 # Include protocol in agent
 client_agent.include(evaluation_protocol)
 
 @client_agent.on_event("startup")
 async def startup(ctx: Context):
+    global agent_context, agent_loop
+    agent_context = ctx
+    agent_loop = asyncio.get_running_loop()
     ctx.logger.info(f"Client Agent started with address: {client_agent.address}")
 
+def dispatch_queued_work():
+    """Process queued requests right away; only valid on the Bureau's event loop"""
+    if agent_context is not None:
+        _spawn(check_queues(agent_context))
+
 def get_evaluation_status(interaction_id: str):
     """Get evaluation status for Flask API"""
     return evaluations.get(interaction_id)
 
-def trigger_evaluation(interaction_id: str, job_title: str, job_description: str, requirements: list, profile_data: dict, freelancer_address: str):
+def trigger_evaluation(interaction_id: str, job_title: str, job_description: str, requirements: list, profile_data: dict, freelancer_address: str = None, task_id: str = None, deprioritized: bool = False):
     """Trigger evaluation by adding to queue"""
-    evaluation_queue.put({
+    eval_data = {
         'interaction_id': interaction_id,
         'job_title': job_title,
         'job_description': job_description,
         'requirements': requirements,
         'profile_data': profile_data,
         'freelancer_address': freelancer_address
-    })
+    }
+    flow = task_id or interaction_id
+    cost = 1.0
+    if deprioritized:
+        # A flow of its own, so better matches for the same task queued later can pass it,
+        # at a weight that lets it through only after several jobs of every other flow
+        flow = f"{flow}:deprioritized"
+        cost = SKILL_PRESCREEN_DEPRIORITIZED_COST
+    scheduler.submit('evaluation', interaction_id, flow, {'kind': 'evaluation', 'eval_data': eval_data}, cost=cost)
+
+def record_prescreen_rejection(interaction_id: str, job_title: str, job_description: str, requirements: list, profile_data: dict, coverage: float, batch_id: str = None):
+    """Complete an evaluation the skill pre-screen ruled out, without any LLM calls"""
+    conversation = Transcript()
+    conversation.append('client_agent', "Sorry, your freelancer doesn't match the job requirement. None of the listed skills cover the task's requirements closely enough.")
+    
+    evaluations[interaction_id] = {
+        'job_title': job_title,
+        'job_description': job_description,
+        'requirements': requirements,
+        'profile_data': profile_data,
+        'conversation': conversation,
+        'status': 'completed',
+        'finished_at': time.monotonic(),
+        'decision': 'NOT APPROVED',
+        'score': 0.0,
+        'skill_coverage': coverage,
+        'prescreened': True
+    }
+    
+    if batch_id:
+        evaluations[interaction_id]['batch_id'] = batch_id
+
+def trigger_bulk_evaluation(batch_id: str, task_id: str, job_title: str, job_description: str, requirements: list, candidates: list, freelancer_address: str = None):
+    """Queue one task against many candidate profiles"""
+    pending = []
+    for candidate in candidates:
+        if candidate.get('prescreen_rejected'):
+            record_prescreen_rejection(
+                candidate['interaction_id'],
+                job_title,
+                job_description,
+                requirements,
+                candidate['profile_data'],
+                candidate.get('skill_coverage'),
+                batch_id=batch_id
+            )
+            continue
+        
+        pending.append({
+            'interaction_id': candidate['interaction_id'],
+            'job_title': job_title,
+            'job_description': job_description,
+            'requirements': requirements,
+            'profile_data': candidate['profile_data'],
+            'freelancer_address': freelancer_address
+        })
+    
+    bulk_evaluations[batch_id] = {
+        'batch_id': batch_id,
+        'task_id': task_id,
+        'job_title': job_title,
+        'job_description': job_description,
+        'requirements': requirements,
+        'interaction_ids': [candidate['interaction_id'] for candidate in candidates],
+        'pending': pending,
+        'active': 0,
+        'status': 'queued'
+    }
+    
+    # Introduction and questions for the whole batch cost about two evaluations' worth of LLM calls
+    scheduler.submit('evaluation', batch_id, task_id, {'kind': 'bulk', 'batch_id': batch_id}, cost=2.0)
 
-def trigger_verification(task_data: dict, submission_data: dict, interaction_id: str):
+def get_bulk_evaluation_status(batch_id: str):
+    """Progress of a bulk evaluation and its candidates ranked by score"""
+    batch = bulk_evaluations.get(batch_id)
+    if not batch:
+        return None
+    
+    profiles = {candidate['interaction_id']: candidate['profile_data'] for candidate in batch['pending']}
+    candidates = []
+    for interaction_id in batch['interaction_ids']:
+        evaluation = evaluations.get(interaction_id, {})
+        profile = evaluation.get('profile_data') or profiles.get(interaction_id, {})
+        candidates.append({
+            'interaction_id': interaction_id,
+            'name': profile.get('name', ''),
+            'wallet': profile.get('wallet', ''),
+            'status': evaluation.get('status', 'queued'),
+            'decision': evaluation.get('decision', 'PENDING'),
+            'score': evaluation.get('score', 0.0),
+            'prescreened': evaluation.get('prescreened', False)
+        })
+    
+    finished = [c for c in candidates if c['status'] == 'completed']
+    shortlist = sorted(
+        finished,
+        key=lambda c: (c['decision'] == 'APPROVED', c['score']),
+        reverse=True
+    )
+    
+    return {
+        'batch_id': batch_id,
+        'task_id': batch['task_id'],
+        'status': batch['status'],
+        'total': len(candidates),
+        'completed': len(finished),
+        'questions': batch.get('questions', []),
+        'shortlist': shortlist,
+        'candidates': candidates
+    }
+
+def trigger_verification(task_data: dict, submission_data: dict, interaction_id: str, bypass_cache: bool = False, task_id: str = None):
     """Trigger work verification process"""
-    verification_queue.put({
-        'task_data': task_data,
-        'submission_data': submission_data,
-        'interaction_id': interaction_id
-    })
+    cache_key = verification_cache_key(task_data, submission_data)
+    
+    if bypass_cache:
+        verification_cache.record_bypass()
+    else:
+        cached = verification_cache.get(cache_key)
+        if cached:
+            # Identical submission was already verified - reuse the decision
+            conversation = Transcript()
+            conversation.append('client_agent', f"{cached['decision']}: {cached['feedback']}")
+            
+            verifications[interaction_id] = {
+                'status': 'completed',
+                'finished_at': time.monotonic(),
+                'conversation': conversation,
+                'decision': cached['decision'],
+                'feedback': cached['feedback'],
+                'cached': True
+            }
+            return
     
     verifications[interaction_id] = {
         'status': 'processing',
-        'conversation': [],
+        'conversation': Transcript(),
         'decision': 'PENDING'
     }
+    
+    scheduler.submit('verification', interaction_id, task_id or interaction_id, {
+        'kind': 'verification',
+        'task_data': task_data,
+        'submission_data': submission_data,
+        'interaction_id': interaction_id,
+        'cache_key': cache_key
+    })
+
+def get_queue_depth(kind: str) -> int:
+    """Requests waiting to be picked up by the Client Agent"""
+    if kind == 'verification':
+        return scheduler.depth('verification')
+    return scheduler.depth('evaluation') + sum(len(batch['pending']) for batch in list(bulk_evaluations.values()))
 
 def get_verification_status(interaction_id: str) -> dict:
     """Get the current status of a verification"""
     return verifications.get(interaction_id, {})
+
+def _take_pending_candidate(interaction_id: str):
+    """Remove a bulk candidate that has not been scheduled yet from its batch"""
+    for batch in list(bulk_evaluations.values()):
+        for candidate in list(batch['pending']):
+            if candidate['interaction_id'] == interaction_id:
+                try:
+                    batch['pending'].remove(candidate)
+                except ValueError:
+                    # Started in the meantime
+                    return None
+                return {**candidate, 'batch_id': batch['batch_id']}
+    return None
+
+def cancel_interaction(interaction_id: str) -> bool:
+    """Cancel a queued or running evaluation or verification; False if unknown or already finished"""
+    job = scheduler.remove(interaction_id)
+    if stop_interaction(interaction_id, 'cancelled', 'Cancelled by request.'):
+        # Running, or a verification that was still queued
+        return True
+    
+    if job and job['kind'] == 'evaluation':
+        eval_data = {**job['eval_data'], 'batch_id': job.get('batch_id')}
+        if job.get('batch_id') and agent_loop is not None:
+            # Scheduled candidates count against their batch's concurrency
+            agent_loop.call_soon_threadsafe(_spawn, finish_bulk_candidate(agent_context, job['batch_id']))
+    else:
+        eval_data = _take_pending_candidate(interaction_id)
+    if eval_data is None:
+        return False
+    
+    conversation = Transcript()
+    conversation.append('system', 'Cancelled by request.')
+    evaluations[interaction_id] = {
+        'job_title': eval_data['job_title'],
+        'profile_data': eval_data['profile_data'],
+        'conversation': conversation,
+        'status': 'failed',
+        'finished_at': time.monotonic(),
+        'failure_reason': 'cancelled'
+    }
+    release_interaction(evaluations[interaction_id])
+    if eval_data.get('batch_id'):
+        evaluations[interaction_id]['batch_id'] = eval_data['batch_id']
+    interaction_stats['cancelled'] += 1
+    return True
+
+def get_interaction_metrics() -> dict:
+    """Interaction lifecycle counters, including those stuck past their stage or overall deadline"""
+    now = time.monotonic()
+    processing = [
+        record for record in list(evaluations.values()) + list(verifications.values())
+        if record.get('status') == 'processing'
+    ]
+    return {
+        'processing': len(processing),
+        'stuck': sum(1 for record in processing if past_deadline(record, now)),
+        'awaiting_retry': sum(1 for record in processing if record.get('retries')),
+        'llm_calls_in_flight': sum(len(tasks) for tasks in list(llm_tasks.values())),
+        **interaction_stats
+    }
+
+def get_freelancer_pool_load() -> dict:
+    """Evaluations in progress per Freelancer Agent replica"""
+    return {address: len(outstanding) for address, outstanding in list(freelancer_pool.items())}
@@ -1,53 +1,69 @@
 """Freelancer Agent - Represents freelancer in evaluations"""
 from uagents import Agent, Context, Protocol
-from openai import OpenAI
+from llm_cassette import make_asi_client
+import asyncio
 import os
 from datetime import datetime
 from uuid import uuid4
 from message_models import (
     EvaluationIntroduction,
     IntroductionAcknowledgment,
+    AcknowledgmentUpdate,
     ProfileDataMessage,
     QuestionMessage,
-    QuestionResponse
+    QuestionResponse,
+    EvaluationClosed
 )
+from prompt_builder import complete, fit_prompt, truncate_text, compact_description, compact_skills, compact_answer
+from message_templates import AGENT_MESSAGE_MODE, acknowledgment_template
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Create Freelancer Agent
-freelancer_agent = Agent(
-    name="freelancer_representative",
-    port=8002,
-    seed="freelancer_agent_seed_phrase_67890",
-    endpoint=["http://localhost:8002/submit"]
-)
+# Freelancer Agent replicas run in the Bureau; each handles its own messages one at a time
+FREELANCER_POOL_SIZE = max(1, int(os.getenv('FREELANCER_POOL_SIZE', '1')))
 
-# ASI-1 LLM client for AI-generated messages
-asi_client = OpenAI(
-    base_url='https://api.asi1.ai/v1',
-    api_key=os.getenv('ASI_API_KEY'),
-)
+def create_freelancer_agent(index: int) -> Agent:
+    """Freelancer Agent replica; replica 0 keeps the original name, seed and address"""
+    suffix = f"_{index}" if index else ""
+    return Agent(
+        name=f"freelancer_representative{suffix}",
+        port=8002 + index,
+        seed=f"freelancer_agent_seed_phrase_67890{suffix}",
+        endpoint=[f"http://localhost:{8002 + index}/submit"]
+    )
 
-# Storage for profile data per interaction
+# ASI-1 LLM client for AI-generated messages (or a recording/replaying cassette)
+asi_client = make_asi_client()
+
+# Storage for profile data per replica and interaction; the Client Agent keeps
+# every interaction on one replica, so a replica only sees its own profiles
 profile_storage = {}
 
+def replica_profiles(ctx: Context) -> dict:
+    return profile_storage.setdefault(str(ctx.agent.address), {})
+
+# Acknowledgments being written in the background
+background_tasks = set()
+
 def generate_acknowledgment(client_message: str) -> str:
     """Use ASI-1 LLM to generate acknowledgment"""
     try:
-        prompt = f"""
+        system_prompt = "You are a Freelancer Agent. Respond professionally and briefly to acknowledge the Client Agent's message."
+        prompt = fit_prompt('acknowledgment', """
         The Client Agent just said to you:
         "{client_message}"
         
         Respond briefly and professionally, acknowledging that you understand and are ready to help.
         Keep it short (1-2 sentences).
-        """
+        """, system=system_prompt, client_message=truncate_text(client_message, 200))
         
-        response = asi_client.chat.completions.create(
-            model="asi1-mini",
+        response = complete(
+            asi_client,
+            'acknowledgment',
             messages=[
-                {"role": "system", "content": "You are a Freelancer Agent. Respond professionally and briefly to acknowledge the Client Agent's message."},
+                {"role": "system", "content": system_prompt},
                 {"role": "user", "content": prompt},
             ],
             max_tokens=50,
@@ -60,14 +76,28 @@ def generate_acknowledgment(client_message: str) -> str:
 # Create protocol for evaluation responses
 response_protocol = Protocol("EvaluationResponse")
 
-@response_protocol.on_message(model=EvaluationIntroduction, replies={IntroductionAcknowledgment})
+async def send_acknowledgment_update(ctx: Context, sender: str, msg: EvaluationIntroduction):
+    """Follow a template acknowledgment with the LLM-written one"""
+    acknowledgment = await asyncio.to_thread(generate_acknowledgment, msg.message)
+    await ctx.send(
+        sender,
+        AcknowledgmentUpdate(
+            message=acknowledgment,
+            interaction_id=msg.interaction_id
+        )
+    )
+
+@response_protocol.on_message(model=EvaluationIntroduction, replies={IntroductionAcknowledgment, AcknowledgmentUpdate})
 async def handle_introduction(ctx: Context, sender: str, msg: EvaluationIntroduction):
     """Handle introduction from Client Agent - respond autonomously"""
     ctx.logger.info(f"Received introduction from Client Agent: {msg.message}")
     
-    # Generate AI response
-    ctx.logger.info("Generating acknowledgment...")
-    acknowledgment = generate_acknowledgment(msg.message)
+    if AGENT_MESSAGE_MODE == 'llm':
+        # Generate AI response
+        ctx.logger.info("Generating acknowledgment...")
+        acknowledgment = await asyncio.to_thread(generate_acknowledgment, msg.message)
+    else:
+        acknowledgment = acknowledgment_template(msg.job_title, msg.interaction_id)
     
     ctx.logger.info(f"Sending acknowledgment: {acknowledgment}")
     
@@ -80,32 +110,38 @@ async def handle_introduction(ctx: Context, sender: str, msg: EvaluationIntroduc
             interaction_id=msg.interaction_id
         )
     )
+    
+    if AGENT_MESSAGE_MODE == 'background':
+        # Written off the handler so this replica can take its next message meanwhile
+        task = asyncio.create_task(send_acknowledgment_update(ctx, sender, msg))
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
 
 @response_protocol.on_message(model=ProfileDataMessage)
 async def handle_profile_data(ctx: Context, sender: str, msg: ProfileDataMessage):
     """Store profile data for this interaction"""
     ctx.logger.info(f"Received profile data for interaction: {msg.interaction_id}")
-    profile_storage[msg.interaction_id] = msg.profile_data
+    replica_profiles(ctx)[msg.interaction_id] = msg.profile_data
 
 @response_protocol.on_message(model=QuestionMessage, replies={QuestionResponse})
 async def handle_question(ctx: Context, sender: str, msg: QuestionMessage):
     """Handle question from Client Agent - analyze profile and respond"""
     ctx.logger.info(f"Received question: {msg.question}")
     
-    import asyncio
     await asyncio.sleep(0.5)
     
-    profile = profile_storage.get(msg.interaction_id, {})
+    profile = replica_profiles(ctx).get(msg.interaction_id, {})
     
     try:
-        prompt = f"""
-        Question from Client Agent: {msg.question}
+        system_prompt = "You are a Freelancer Agent. Give brief YES/NO answers about the candidate based on their profile."
+        prompt = fit_prompt('answer', """
+        Question from Client Agent: {question}
         
         Freelancer Profile:
-        - Description: {profile.get('description', 'N/A')}
-        - Skills: {', '.join(profile.get('skills', []))}
-        - Work Experience: {len(profile.get('work_experience', []))} entries
-        - Education: {len(profile.get('education', []))} entries
+        - Description: {description}
+        - Skills: {skills}
+        - Work Experience: {work_experience} entries
+        - Education: {education} entries
         
         Answer with a brief YES/NO response about the freelancer's qualifications.
         
@@ -115,12 +151,21 @@ async def handle_question(ctx: Context, sender: str, msg: QuestionMessage):
         - "No, the freelancer doesn't have experience in [skill]."
         
         Keep answer to 1 sentence only. Be direct.
-        """
+        """,
+            system=system_prompt,
+            question=compact_answer(msg.question),
+            description=compact_description(profile.get('description', 'N/A')),
+            skills=', '.join(compact_skills(profile.get('skills', []))),
+            work_experience=len(profile.get('work_experience', [])),
+            education=len(profile.get('education', []))
+        )
         
-        response = asi_client.chat.completions.create(
-            model="asi1-mini",
+        response = await asyncio.to_thread(
+            complete,
+            asi_client,
+            'answer',
             messages=[
-                {"role": "system", "content": "You are a Freelancer Agent. Give brief YES/NO answers about the candidate based on their profile."},
+                {"role": "system", "content": system_prompt},
                 {"role": "user", "content": prompt},
             ],
             max_tokens=80,
@@ -136,13 +181,25 @@ async def handle_question(ctx: Context, sender: str, msg: QuestionMessage):
         sender,
         QuestionResponse(
             answer=answer,
-            interaction_id=msg.interaction_id
+            interaction_id=msg.interaction_id,
+            question_number=msg.question_number
         )
     )
 
-# Include protocol in agent
-freelancer_agent.include(response_protocol)
+@response_protocol.on_message(model=EvaluationClosed)
+async def handle_evaluation_closed(ctx: Context, sender: str, msg: EvaluationClosed):
+    """Drop the profile data of a finished, timed out or cancelled evaluation"""
+    replica_profiles(ctx).pop(msg.interaction_id, None)
 
-@freelancer_agent.on_event("startup")
 async def startup(ctx: Context):
-    ctx.logger.info(f"Freelancer Agent started with address: {freelancer_agent.address}")
+    ctx.logger.info(f"Freelancer Agent started with address: {ctx.agent.address}")
+
+freelancer_agents = []
+for index in range(FREELANCER_POOL_SIZE):
+    replica = create_freelancer_agent(index)
+    # Include protocol in agent
+    replica.include(response_protocol)
+    replica.on_event("startup")(startup)
+    freelancer_agents.append(replica)
+
+freelancer_agent = freelancer_agents[0]
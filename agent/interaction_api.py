@@ -0,0 +1,427 @@
+"""Request handling shared by the Flask and ASGI servers"""
+import os
+import threading
+import uuid
+from dotenv import load_dotenv
+from supabase import create_client, Client
+
+from client_agent import (
+    client_agent,
+    get_evaluation_status,
+    trigger_evaluation,
+    get_verification_status,
+    trigger_verification,
+    trigger_bulk_evaluation,
+    get_bulk_evaluation_status,
+    get_queue_depth,
+    record_prescreen_rejection,
+    cancel_interaction,
+    get_interaction_metrics,
+    scheduler,
+    register_freelancer_pool,
+    get_freelancer_pool_load,
+    stage_timings
+)
+from freelancer_agent import freelancer_agent, freelancer_agents
+from verification_cache import verification_cache
+from transcript import transcript_json
+from response_snapshot import interaction_body, invalidate_snapshot, encode_json, snapshot_stats
+from skill_index import prescreen, prescreen_batch, get_prescreen_stats, SKILL_PRESCREEN_MODE
+from admission import AdmissionController
+from prompt_builder import prompt_stats
+from llm_cassette import cassette_stats
+
+load_dotenv()
+
+BULK_EVALUATION_MAX_CANDIDATES = int(os.getenv('BULK_EVALUATION_MAX_CANDIDATES', '100'))
+
+# Statuses after which an interaction no longer changes on its own
+FINISHED_STATUSES = ('completed', 'error', 'failed')
+
+supabase_url = os.getenv('SUPABASE_URL') or os.getenv('SUPABASE_URL')
+supabase_key = os.getenv('SUPABASE_ANON_KEY') or os.getenv('SUPABASE_ANON_KEY')
+
+print(f"\n[Supabase Config]")
+print(f"URL: {supabase_url[:30] + '...' if supabase_url else 'NOT SET'}")
+print(f"Key: {'SET' if supabase_key else 'NOT SET'}\n")
+
+supabase: Client = create_client(supabase_url, supabase_key) if supabase_url and supabase_key else None
+
+if not supabase:
+    print("[WARNING] Supabase not configured! Database updates will not work.")
+
+def _interaction_record(kind: str, interaction_id: str):
+    if kind == 'verification':
+        return get_verification_status(interaction_id)
+    return get_evaluation_status(interaction_id)
+
+register_freelancer_pool([agent.address for agent in freelancer_agents])
+
+admission = AdmissionController(get_queue_depth, _interaction_record, FINISHED_STATUSES)
+
+def rejection_response(admitted: dict) -> tuple:
+    """429 response telling the client when to retry"""
+    return (
+        {'error': admitted['error'], 'retry_after': admitted['retry_after']},
+        429,
+        {'Retry-After': str(admitted['retry_after'])}
+    )
+
+# Guards the check-and-set of an evaluation's database update across polls
+assignment_lock = threading.Lock()
+
+def start_evaluation_request(data: dict) -> tuple:
+    """Validate an evaluation request and queue it"""
+    try:
+        task_id = data.get('task_id')
+        profile = data.get('profile')
+        job_requirements = data.get('job_requirements')
+
+        if not all([task_id, profile, job_requirements]):
+            return {'error': 'Missing required fields'}, 400, {}
+
+        interaction_id = str(uuid.uuid4())
+        requirements = job_requirements.get('requirements', [])
+
+        screen = prescreen(requirements, profile)
+        if screen['non_match'] and SKILL_PRESCREEN_MODE == 'reject':
+            record_prescreen_rejection(
+                interaction_id=interaction_id,
+                job_title=job_requirements.get('title', 'Unknown position'),
+                job_description=job_requirements.get('description', ''),
+                requirements=requirements,
+                profile_data=profile,
+                coverage=screen['coverage']
+            )
+
+            return {
+                'interaction_id': interaction_id,
+                'status': 'completed',
+                'message': 'Evaluation completed by skill pre-screen'
+            }, 200, {}
+
+        admitted = admission.admit(
+            'evaluation',
+            [interaction_id],
+            task_id=task_id,
+            wallet=profile.get('wallet'),
+            coalesce=True
+        )
+        if 'coalesced' in admitted:
+            return {
+                'interaction_id': admitted['coalesced'],
+                'status': 'processing',
+                'message': 'Evaluation already in progress',
+                'coalesced': True
+            }, 200, {}
+        if 'error' in admitted:
+            return rejection_response(admitted)
+
+        try:
+            trigger_evaluation(
+                interaction_id=interaction_id,
+                job_title=job_requirements.get('title', 'Unknown position'),
+                job_description=job_requirements.get('description', ''),
+                requirements=requirements,
+                profile_data=profile,
+                task_id=task_id,
+                deprioritized=screen['non_match'] and SKILL_PRESCREEN_MODE == 'deprioritize'
+            )
+        except Exception:
+            admission.release([interaction_id])
+            raise
+
+        return {
+            'interaction_id': interaction_id,
+            'status': 'processing',
+            'message': 'Evaluation initiated'
+        }, 200, {}
+
+    except Exception as e:
+        return {'error': str(e)}, 500, {}
+
+def start_bulk_evaluation_request(data: dict) -> tuple:
+    """Validate a bulk evaluation request and queue it"""
+    try:
+        task_id = data.get('task_id')
+        profiles = data.get('profiles')
+        job_requirements = data.get('job_requirements')
+
+        if not all([task_id, profiles, job_requirements]) or not isinstance(profiles, list):
+            return {'error': 'Missing required fields'}, 400, {}
+
+        if len(profiles) > BULK_EVALUATION_MAX_CANDIDATES:
+            return {'error': f'At most {BULK_EVALUATION_MAX_CANDIDATES} profiles per request'}, 400, {}
+
+        batch_id = str(uuid.uuid4())
+        requirements = job_requirements.get('requirements', [])
+
+        candidates = []
+        for profile, screen in zip(profiles, prescreen_batch(requirements, profiles)):
+            candidates.append({
+                'interaction_id': str(uuid.uuid4()),
+                'profile_data': profile,
+                'skill_coverage': screen['coverage'],
+                'prescreen_rejected': screen['non_match'] and SKILL_PRESCREEN_MODE == 'reject'
+            })
+
+        if SKILL_PRESCREEN_MODE == 'deprioritize':
+            # Best skill matches are evaluated first; stable sort keeps request order otherwise
+            candidates.sort(key=lambda candidate: candidate['skill_coverage'] or 0.0, reverse=True)
+
+        queued_ids = [candidate['interaction_id'] for candidate in candidates if not candidate['prescreen_rejected']]
+        admitted = admission.admit('evaluation', queued_ids, task_id=task_id)
+        if 'error' in admitted:
+            return rejection_response(admitted)
+
+        try:
+            trigger_bulk_evaluation(
+                batch_id=batch_id,
+                task_id=task_id,
+                job_title=job_requirements.get('title', 'Unknown position'),
+                job_description=job_requirements.get('description', ''),
+                requirements=requirements,
+                candidates=candidates
+            )
+        except Exception:
+            admission.release(queued_ids)
+            raise
+
+        return {
+            'batch_id': batch_id,
+            'interaction_ids': [candidate['interaction_id'] for candidate in candidates],
+            'status': 'processing',
+            'message': 'Bulk evaluation initiated'
+        }, 200, {}
+
+    except Exception as e:
+        return {'error': str(e)}, 500, {}
+
+def bulk_evaluation_status(batch_id: str) -> tuple:
+    """Progress and ranked shortlist of a bulk evaluation"""
+    try:
+        batch = get_bulk_evaluation_status(batch_id)
+
+        if not batch:
+            return {'error': 'Batch not found'}, 404
+
+        return batch, 200
+
+    except Exception as e:
+        return {'error': str(e)}, 500
+
+def bulk_evaluation_event(batch_id: str, last_event: bytes) -> tuple:
+    """Next server-sent event of a bulk evaluation stream (None if unchanged) and whether it is done"""
+    batch = get_bulk_evaluation_status(batch_id)
+    event = encode_json(batch)
+    done = batch['status'] == 'completed'
+    if event == last_event:
+        return None, event, done
+    return b'data: ' + event + b'\n\n', event, done
+
+def claim_freelancer_assignment(evaluation: dict, task_id: str, freelancer_wallet: str) -> bool:
+    """Reserve the one database update of an approved evaluation for this poll"""
+    if not (supabase and task_id and freelancer_wallet):
+        return False
+    if evaluation.get('decision') != 'APPROVED' or evaluation.get('status') != 'completed':
+        return False
+
+    with assignment_lock:
+        if evaluation.get('db_updated') or evaluation.get('db_updating'):
+            return False
+        evaluation['db_updating'] = True
+        return True
+
+def assign_freelancer(evaluation: dict, task_id: str, freelancer_wallet: str):
+    """Assign the approved freelancer to the task (blocking database call)"""
+    try:
+        supabase.table('tasks').update({
+            'freelancer_wallet': freelancer_wallet,
+            'status': 'in-progress'
+        }).eq('id', task_id).execute()
+
+        evaluation['db_updated'] = True
+        evaluation['needs_smart_contract_assignment'] = True
+        evaluation['freelancer_wallet'] = freelancer_wallet
+        invalidate_snapshot(evaluation)
+    except Exception as e:
+        print(f"Database update error: {e}")
+    finally:
+        evaluation['db_updating'] = False
+
+def reasoning_payload(evaluation: dict) -> dict:
+    return {
+        'status': evaluation.get('status'),
+        'conversation': transcript_json(evaluation),
+        'decision': evaluation.get('decision', 'PENDING'),
+        'waiting_for_user': False,
+        'needs_smart_contract_assignment': evaluation.get('needs_smart_contract_assignment', False),
+        'freelancer_wallet': evaluation.get('freelancer_wallet', ''),
+        'failure_reason': evaluation.get('failure_reason')
+    }
+
+def verification_payload(verification: dict) -> dict:
+    return {
+        'status': verification.get('status'),
+        'conversation': transcript_json(verification),
+        'decision': verification.get('decision', 'PENDING'),
+        'feedback': verification.get('feedback', ''),
+        'payment_status': verification.get('payment_status', 'pending'),
+        'db_updated': verification.get('db_updated', False),
+        'failure_reason': verification.get('failure_reason')
+    }
+
+def status_body(record: dict, build_payload, accept_encoding: str) -> tuple:
+    """Encoded status poll, served from a pre-encoded snapshot once completed"""
+    return interaction_body(record, lambda: build_payload(record), accept_encoding)
+
+def status_fingerprint(record: dict) -> tuple:
+    """Cheap value that changes whenever a status payload would"""
+    conversation = record.get('conversation')
+    return (
+        record.get('status'),
+        conversation.version if conversation is not None else 0,
+        record.get('db_updated', False),
+        record.get('payment_status')
+    )
+
+def status_event(record: dict, build_payload, last_fingerprint: tuple) -> tuple:
+    """Next server-sent event of a status stream (None if unchanged) and whether it is done"""
+    fingerprint = status_fingerprint(record)
+    done = record.get('status') in FINISHED_STATUSES
+    if fingerprint == last_fingerprint:
+        return None, fingerprint, done
+    return b'data: ' + encode_json(build_payload(record)) + b'\n\n', fingerprint, done
+
+def start_verification_request(data: dict) -> tuple:
+    """Start work verification process"""
+    try:
+        interaction_id = str(uuid.uuid4())
+
+        print(f"[Verify Submission] Starting verification: {interaction_id}")
+        print(f"Task Description: {data.get('task_description', 'N/A')[:50]}...")
+        print(f"Requirements: {data.get('task_requirements', [])}")
+        print(f"Submission Fields: {len(data.get('submission_data', {}).get('fields', []))}")
+
+        admitted = admission.admit(
+            'verification',
+            [interaction_id],
+            task_id=data.get('task_id'),
+            wallet=data.get('freelancer_wallet')
+        )
+        if 'error' in admitted:
+            print(f"[Verify Submission] Rejected: {admitted['error']}")
+            return rejection_response(admitted)
+
+        try:
+            trigger_verification(
+                task_data={
+                    'description': data['task_description'],
+                    'requirements': data['task_requirements']
+                },
+                submission_data=data['submission_data'],
+                interaction_id=interaction_id,
+                bypass_cache=bool(data.get('bypass_cache', False)),
+                task_id=data.get('task_id')
+            )
+        except Exception:
+            admission.release([interaction_id])
+            raise
+
+        verification = get_verification_status(interaction_id)
+        if verification.get('cached'):
+            print(f"[Verify Submission] Served cached decision: {verification['decision']}")
+        else:
+            print(f"[Verify Submission] Verification queued successfully")
+
+        return {
+            'interaction_id': interaction_id,
+            'status': verification.get('status', 'processing'),
+            'cached': verification.get('cached', False)
+        }, 200, {}
+    except Exception as e:
+        print(f"[Verify Submission] ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        return {'error': str(e)}, 500, {}
+
+def complete_payment_request(interaction_id: str, data: dict) -> tuple:
+    """Mark payment as completed and update task status (blocking database call)"""
+    try:
+        task_id = data.get('task_id')
+        tx_hash = data.get('tx_hash')
+
+        verification = get_verification_status(interaction_id)
+
+        if not verification:
+            return {'error': 'Verification not found'}, 404
+
+        print(f"[Payment] Completing payment for task {task_id}, tx: {tx_hash}")
+
+        if supabase and task_id:
+            try:
+                supabase.table('tasks').update({
+                    'status': 'completed'
+                }).eq('id', task_id).execute()
+
+                print(f"[Payment] ✅ Task {task_id} marked as completed")
+
+                verification['payment_status'] = 'completed'
+                verification['db_updated'] = True
+                verification['tx_hash'] = tx_hash
+                invalidate_snapshot(verification)
+
+                return {
+                    'success': True,
+                    'message': 'Payment completed successfully'
+                }, 200
+            except Exception as e:
+                print(f"[Payment] ❌ Error: {e}")
+                return {'error': str(e)}, 500
+        else:
+            return {'error': 'Missing task_id or Supabase not configured'}, 400
+
+    except Exception as e:
+        return {'error': str(e)}, 500
+
+def cancel_interaction_request(interaction_id: str) -> tuple:
+    """Stop a queued or running evaluation or verification and free its state"""
+    if cancel_interaction(interaction_id):
+        return {'success': True, 'interaction_id': interaction_id, 'status': 'failed'}, 200
+
+    record = get_evaluation_status(interaction_id) or get_verification_status(interaction_id)
+    if record:
+        return {'error': f"Interaction already {record.get('status')}"}, 409
+    return {'error': 'Interaction not found'}, 404
+
+def health_payload(bureau_running: bool) -> dict:
+    return {
+        'status': 'healthy',
+        'bureau_running': bureau_running,
+        'agents': {
+            'client': str(client_agent.address),
+            'freelancer': str(freelancer_agent.address),
+            'freelancer_replicas': [str(agent.address) for agent in freelancer_agents]
+        }
+    }
+
+def metrics_payload() -> dict:
+    return {
+        'verification_cache': verification_cache.stats(),
+        'skill_prescreen': get_prescreen_stats(),
+        'response_snapshots': snapshot_stats,
+        'admission': admission.metrics(),
+        'interactions': get_interaction_metrics(),
+        'scheduler': scheduler.stats(),
+        'freelancer_pool': get_freelancer_pool_load(),
+        'evaluation_stages': stage_timings.snapshot(),
+        'llm_calls': prompt_stats.snapshot(),
+        'llm_cassette': cassette_stats()
+    }
+
+def agent_addresses_payload() -> dict:
+    return {
+        'client_agent': str(client_agent.address),
+        'freelancer_agent': str(freelancer_agent.address),
+        'freelancer_agents': [str(agent.address) for agent in freelancer_agents]
+    }
@@ -0,0 +1,163 @@
+"""Record/replay of ASI-1 chat completions for deterministic offline runs"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+from openai import OpenAI
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# off: call ASI-1, record: call ASI-1 and save every exchange, replay: serve saved exchanges only
+LLM_CASSETTE_MODE = os.getenv('LLM_CASSETTE_MODE', 'off').lower()
+LLM_CASSETTE_PATH = os.getenv('LLM_CASSETTE_PATH', 'llm_cassette.jsonl')
+# Replay delay per call: 'recorded' for the original latency, or a fixed number of seconds
+LLM_REPLAY_LATENCY = os.getenv('LLM_REPLAY_LATENCY', '0')
+
+# Retries of a failed ASI-1 request; every attempt together must fit in one LLM stage
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '1'))
+# Stopping an interaction only abandons its LLM call, so the HTTP timeout is what frees the
+# worker thread. Attempts split the stage deadline so the thread is back by the time the
+# watchdog gives up on the stage (same variable as the Client Agent's stage deadline).
+LLM_REQUEST_TIMEOUT = float(os.getenv('LLM_STAGE_TIMEOUT', '120')) / (LLM_MAX_RETRIES + 1)
+
+logger = logging.getLogger(__name__)
+
+class CassetteMiss(Exception):
+    """Replay found no recorded response for a request"""
+
+def request_key(request: dict) -> str:
+    """Stable hash of the parts of a request that determine the response"""
+    canonical = json.dumps(
+        {
+            'model': request.get('model'),
+            'messages': request.get('messages'),
+            'max_tokens': request.get('max_tokens')
+        },
+        sort_keys=True,
+        separators=(',', ':')
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def _response_object(recorded: dict):
+    """Minimal stand-in for an OpenAI ChatCompletion"""
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=recorded['content']))],
+        usage=SimpleNamespace(
+            prompt_tokens=recorded.get('prompt_tokens'),
+            completion_tokens=recorded.get('completion_tokens')
+        )
+    )
+
+class _Completions:
+    def __init__(self, cassette):
+        self._cassette = cassette
+
+    def create(self, **request):
+        return self._cassette.create(request)
+
+class CassetteClient:
+    """Drop-in for the OpenAI client's chat.completions.create in record or replay mode"""
+
+    def __init__(self, mode: str, path: str, client=None, replay_latency: str = '0'):
+        self.mode = mode
+        self.path = path
+        self._client = client
+        self._replay_latency = replay_latency
+        self._lock = threading.Lock()
+        self._recordings = {}
+        # Callers fall back to canned text on any LLM error, so misses are counted here
+        # where a run that did not really replay can still be detected
+        self._counts = {'recorded': 0, 'replayed': 0, 'misses': 0}
+        self.chat = SimpleNamespace(completions=_Completions(self))
+        if mode == 'replay':
+            self._load()
+
+    def _load(self):
+        with open(self.path, encoding='utf-8') as cassette:
+            for line in cassette:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._recordings.setdefault(entry['key'], deque()).append(entry)
+
+    def create(self, request: dict):
+        if self.mode == 'replay':
+            return self._replay(request)
+        return self._record(request)
+
+    def _record(self, request: dict):
+        started = time.perf_counter()
+        response = self._client.chat.completions.create(**request)
+        latency = time.perf_counter() - started
+
+        usage = getattr(response, 'usage', None)
+        entry = {
+            'key': request_key(request),
+            'request': request,
+            'response': {
+                'content': response.choices[0].message.content,
+                'prompt_tokens': getattr(usage, 'prompt_tokens', None),
+                'completion_tokens': getattr(usage, 'completion_tokens', None)
+            },
+            'latency': round(latency, 4)
+        }
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as cassette:
+                cassette.write(json.dumps(entry) + '\n')
+            self._counts['recorded'] += 1
+        return response
+
+    def _replay(self, request: dict):
+        key = request_key(request)
+        with self._lock:
+            recordings = self._recordings.get(key)
+            if not recordings:
+                self._counts['misses'] += 1
+                logger.error(f"Cassette miss: no recorded response for request {key[:12]} in {self.path}")
+                raise CassetteMiss(f"No recorded response for request {key[:12]}")
+            # Identical requests replay in recorded order; the last one repeats
+            entry = recordings.popleft() if len(recordings) > 1 else recordings[0]
+            self._counts['replayed'] += 1
+
+        if self._replay_latency == 'recorded':
+            time.sleep(entry.get('latency', 0))
+        elif float(self._replay_latency) > 0:
+            time.sleep(float(self._replay_latency))
+        return _response_object(entry['response'])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'mode': self.mode, 'path': self.path, **self._counts}
+
+_asi_client = None
+
+def make_asi_client():
+    """ASI-1 client honouring LLM_CASSETTE_MODE, shared by both agents so one cassette serves both"""
+    global _asi_client
+    if _asi_client is not None:
+        return _asi_client
+
+    if LLM_CASSETTE_MODE == 'replay':
+        _asi_client = CassetteClient('replay', LLM_CASSETTE_PATH, replay_latency=LLM_REPLAY_LATENCY)
+        return _asi_client
+
+    client = OpenAI(
+        base_url='https://api.asi1.ai/v1',
+        api_key=os.getenv('ASI_API_KEY'),
+        timeout=LLM_REQUEST_TIMEOUT,
+        max_retries=LLM_MAX_RETRIES,
+    )
+    if LLM_CASSETTE_MODE == 'record':
+        client = CassetteClient('record', LLM_CASSETTE_PATH, client=client)
+    _asi_client = client
+    return _asi_client
+
+def cassette_stats() -> dict:
+    """Recorded, replayed and missed calls of the shared client"""
+    if isinstance(_asi_client, CassetteClient):
+        return _asi_client.stats()
+    return {'mode': 'off'}
@@ -22,6 +22,11 @@ class IntroductionAcknowledgment(Model):
     ready: bool
     interaction_id: str
 
+class AcknowledgmentUpdate(Model):
+    """Freelancer Agent's LLM-written acknowledgment, replacing the template it sent first"""
+    message: str
+    interaction_id: str
+
 class ProfileDataMessage(Model):
     """ profile data"""
     profile_data: dict
@@ -31,11 +36,17 @@ class QuestionMessage(Model):
     """Client Agent asks question to Freelancer Agent"""
     question: str
     interaction_id: str
+    question_number: int = 0  # Echoed back so late replies to resent questions can be told apart
 
 class QuestionResponse(Model):
     """Freelancer Agent responds to question"""
     answer: str
     interaction_id: str
+    question_number: int = 0
+
+class EvaluationClosed(Model):
+    """Client Agent finished, timed out or cancelled an evaluation"""
+    interaction_id: str
 
 class VerificationRequest(Model):
     """Request to verify submitted work"""
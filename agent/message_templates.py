@@ -0,0 +1,34 @@
+"""Template pool for courtesy agent messages that don't affect the evaluation"""
+import hashlib
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# llm: write every courtesy message with ASI-1
+# template: fill in a local template, no LLM call
+# background: send a template right away and swap in the ASI-1 text once it is ready
+AGENT_MESSAGE_MODE = os.getenv('AGENT_MESSAGE_MODE', 'llm').lower()
+
+INTRODUCTION_TEMPLATES = (
+    "Hello, I'm evaluating whether your freelancer can take on the {job_title} task. I'll ask you a few questions, and I'd like your analysis of the freelancer's profile for each one.",
+    "Hi there. I'll be checking if your freelancer is a good fit for {job_title}. Please answer my questions based on what their profile shows.",
+    "Good day. For the {job_title} position, I'll ask a short series of questions to see if your freelancer can do the task. Your analysis of their profile will guide my decision.",
+)
+
+ACKNOWLEDGMENT_TEMPLATES = (
+    "Understood. I have the freelancer's profile ready and I'm happy to answer your questions about {job_title}.",
+    "Thanks for the introduction. I'm ready to walk you through how the freelancer's background fits {job_title}.",
+    "Sounds good. Ask away, and I'll answer based on the freelancer's profile.",
+)
+
+def render(templates: tuple, key: str, **values) -> str:
+    """Fill in a template, picking the same one every time for the same key"""
+    index = int(hashlib.sha256(key.encode('utf-8')).hexdigest(), 16) % len(templates)
+    return templates[index].format(**values)
+
+def introduction_template(job_title: str, key: str) -> str:
+    return render(INTRODUCTION_TEMPLATES, key, job_title=' '.join(str(job_title).split()))
+
+def acknowledgment_template(job_title: str, key: str) -> str:
+    return render(ACKNOWLEDGMENT_TEMPLATES, key, job_title=' '.join(str(job_title).split()))
@@ -0,0 +1,263 @@
+"""Drive a fixed workload against a running server and report end-to-end times
+
+Start the server with LLM_CASSETTE_MODE=replay to get deterministic, offline runs:
+
+    LLM_CASSETTE_MODE=replay LLM_CASSETTE_PATH=evaluations.jsonl python server.py
+    python perf_run.py workload.json
+
+The workload file holds {"evaluations": [<evaluate-freelancer body>, ...],
+"verifications": [<verify-submission body>, ...]}.
+
+With --bulk the file holds one bulk evaluation instead,
+{"task_id": ..., "job_requirements": {...}, "profiles": [...]}. Its profiles are
+sent once through POST /evaluate-freelancers, and once as one
+/evaluate-freelancer call per profile. The report has both timings, so a
+cassette recorded with both request styles compares them offline.
+
+With --streams N the first evaluation of the workload is started and N
+/reasoning-stream connections are held open on it until it finishes. Run it
+against server.py and asgi_server.py to compare how many open streams each
+one sustains.
+
+The run exits with status 1 if it did not measure the workload as written:
+requests rejected by admission control, requests coalesced into another
+interaction, or replays missing from the cassette (those would silently get
+the agents' fallback text).
+"""
+import argparse
+import asyncio
+import json
+import math
+import statistics
+import sys
+import time
+import httpx
+import requests
+
+def cassette_misses(base_url: str) -> int:
+    return requests.get(f"{base_url}/metrics").json().get('llm_cassette', {}).get('misses', 0)
+
+def llm_call_count(base_url: str) -> int:
+    calls = requests.get(f"{base_url}/metrics").json().get('llm_calls', {})
+    return sum(entry['calls'] for entry in calls.values())
+
+def submit(base_url: str, path: str, body: dict, rejected: list) -> dict:
+    """POST one request; None (and the reason in rejected) if the server did not start it"""
+    response = requests.post(f"{base_url}{path}", json=body)
+    if response.status_code != 200:
+        is_json = response.headers.get('Content-Type', '').startswith('application/json')
+        rejected.append({
+            'path': path,
+            'status': response.status_code,
+            'error': response.json().get('error') if is_json else response.text[:200]
+        })
+        return None
+    return response.json()
+
+def wait_for(base_url: str, pending: dict, started: float, poll_interval: float, timeout: float) -> tuple:
+    """Poll until every pending interaction has finished; (durations, failed ids), leaving stragglers in pending"""
+    durations = {}
+    failed = []
+    while pending and time.perf_counter() - started < timeout:
+        for interaction_id, (route, submitted) in list(pending.items()):
+            status = requests.get(f"{base_url}/{route}/{interaction_id}")
+            if status.status_code != 200:
+                # Not started yet, like bulk candidates still queued in their batch
+                continue
+            state = status.json().get('status')
+            if state in ('completed', 'error', 'failed'):
+                durations[interaction_id] = time.perf_counter() - submitted
+                if state != 'completed':
+                    failed.append(interaction_id)
+                del pending[interaction_id]
+        time.sleep(poll_interval)
+    return durations, failed
+
+def summarize(started: float, durations: dict, failed: list, pending: dict) -> dict:
+    values = sorted(durations.values())
+    return {
+        'total_seconds': round(time.perf_counter() - started, 3),
+        'finished': len(values),
+        'failed': len(failed),
+        'timed_out': len(pending),
+        'mean_seconds': round(statistics.mean(values), 3) if values else None,
+        # Nearest-rank percentile
+        'p95_seconds': round(values[math.ceil(len(values) * 0.95) - 1], 3) if values else None
+    }
+
+def run_workload(base_url: str, workload: dict, poll_interval: float, timeout: float) -> dict:
+    """Submit every request at once and wait for all of them to finish"""
+    misses_before = cassette_misses(base_url)
+    started = time.perf_counter()
+    pending = {}
+    rejected = []
+    coalesced = 0
+
+    for body in workload.get('evaluations', []):
+        response = submit(base_url, '/evaluate-freelancer', body, rejected)
+        if response is None:
+            continue
+        if response.get('coalesced'):
+            # Same task and wallet as a request still running; only that one is measured
+            coalesced += 1
+            continue
+        pending[response['interaction_id']] = ('reasoning-status', time.perf_counter())
+
+    for body in workload.get('verifications', []):
+        response = submit(base_url, '/verify-submission', {**body, 'bypass_cache': True}, rejected)
+        if response is not None:
+            pending[response['interaction_id']] = ('verification-status', time.perf_counter())
+
+    durations, failed = wait_for(base_url, pending, started, poll_interval, timeout)
+    metrics = requests.get(f"{base_url}/metrics").json()
+    return {
+        **summarize(started, durations, failed, pending),
+        'submitted': len(workload.get('evaluations', [])) + len(workload.get('verifications', [])),
+        'rejected': len(rejected),
+        'rejections': rejected,
+        'coalesced': coalesced,
+        'cassette_misses': metrics.get('llm_cassette', {}).get('misses', 0) - misses_before,
+        'llm_calls': metrics.get('llm_calls', {})
+    }
+
+def run_bulk_comparison(base_url: str, bulk: dict, poll_interval: float, timeout: float) -> dict:
+    """The same profiles as one bulk evaluation, then as single evaluations, one run after the other"""
+    misses_before = cassette_misses(base_url)
+    rejected = []
+    coalesced = 0
+    runs = {}
+
+    calls_before = llm_call_count(base_url)
+    started = time.perf_counter()
+    pending = {}
+    response = submit(base_url, '/evaluate-freelancers', bulk, rejected)
+    if response is not None:
+        for interaction_id in response['interaction_ids']:
+            pending[interaction_id] = ('reasoning-status', started)
+    durations, failed = wait_for(base_url, pending, started, poll_interval, timeout)
+    runs['bulk'] = {**summarize(started, durations, failed, pending), 'llm_calls': llm_call_count(base_url) - calls_before}
+
+    calls_before = llm_call_count(base_url)
+    started = time.perf_counter()
+    pending = {}
+    for profile in bulk['profiles']:
+        body = {'task_id': bulk['task_id'], 'job_requirements': bulk['job_requirements'], 'profile': profile}
+        response = submit(base_url, '/evaluate-freelancer', body, rejected)
+        if response is None:
+            continue
+        if response.get('coalesced'):
+            coalesced += 1
+            continue
+        pending[response['interaction_id']] = ('reasoning-status', time.perf_counter())
+    durations, failed = wait_for(base_url, pending, started, poll_interval, timeout)
+    runs['single'] = {**summarize(started, durations, failed, pending), 'llm_calls': llm_call_count(base_url) - calls_before}
+
+    bulk_seconds = runs['bulk']['total_seconds']
+    return {
+        'profiles': len(bulk['profiles']),
+        **runs,
+        'speedup': round(runs['single']['total_seconds'] / bulk_seconds, 2) if bulk_seconds else None,
+        'rejected': len(rejected),
+        'rejections': rejected,
+        'coalesced': coalesced,
+        'cassette_misses': cassette_misses(base_url) - misses_before
+    }
+
+async def hold_streams(base_url: str, interaction_id: str, count: int, timeout: float) -> dict:
+    """Open count event streams on one interaction at once and read each until the server ends it"""
+    open_streams = 0
+    max_open = 0
+    connect_seconds = []
+    events = []
+    finished = 0
+    errors = {}
+
+    async def read_stream(client: httpx.AsyncClient):
+        nonlocal open_streams, max_open, finished
+        started = time.perf_counter()
+        async with client.stream('GET', f"/reasoning-stream/{interaction_id}") as response:
+            response.raise_for_status()
+            connect_seconds.append(time.perf_counter() - started)
+            open_streams += 1
+            max_open = max(max_open, open_streams)
+            received = 0
+            last = None
+            try:
+                async for line in response.aiter_lines():
+                    if line.startswith('data: '):
+                        received += 1
+                        last = line
+            finally:
+                open_streams -= 1
+        events.append(received)
+        if last and json.loads(last[len('data: '):]).get('status') in ('completed', 'error', 'failed'):
+            finished += 1
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=0)
+    started = time.perf_counter()
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        results = await asyncio.gather(*(read_stream(client) for _ in range(count)), return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            name = type(result).__name__
+            errors[name] = errors.get(name, 0) + 1
+
+    connect_seconds.sort()
+    return {
+        'streams': count,
+        'opened': len(connect_seconds),
+        'max_open_at_once': max_open,
+        'finished': finished,
+        'errors': errors,
+        'total_seconds': round(time.perf_counter() - started, 3),
+        'connect_p50_seconds': round(connect_seconds[len(connect_seconds) // 2], 3) if connect_seconds else None,
+        'connect_max_seconds': round(connect_seconds[-1], 3) if connect_seconds else None,
+        'events_per_stream': round(statistics.mean(events), 2) if events else None
+    }
+
+def run_streams(base_url: str, workload: dict, count: int, timeout: float) -> dict:
+    """Hold count status streams open on the workload's first evaluation"""
+    rejected = []
+    response = submit(base_url, '/evaluate-freelancer', workload['evaluations'][0], rejected)
+    if response is None:
+        return {'streams': count, 'opened': 0, 'errors': {}, 'rejected': len(rejected), 'rejections': rejected, 'coalesced': 0}
+    interaction_id = response['interaction_id']
+    started = time.perf_counter()
+    # The interaction can only be streamed once the scheduler has started it
+    while requests.get(f"{base_url}/reasoning-status/{interaction_id}").status_code == 404:
+        if time.perf_counter() - started > timeout:
+            return {'streams': count, 'opened': 0, 'errors': {'NotStarted': 1}, 'rejected': 0, 'coalesced': 0}
+        time.sleep(0.2)
+    result = asyncio.run(hold_streams(base_url, interaction_id, count, timeout))
+    # A coalesced evaluation is still a live interaction to stream, so it is not counted against the run
+    return {**result, 'rejected': 0, 'coalesced': 0}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('workload', help='JSON file with evaluations and verifications, or a bulk evaluation with --bulk')
+    parser.add_argument('--bulk', action='store_true', help='compare /evaluate-freelancers with one call per profile')
+    parser.add_argument('--streams', type=int, default=0, help='hold this many /reasoning-stream connections open instead')
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--poll-interval', type=float, default=0.2)
+    parser.add_argument('--timeout', type=float, default=600)
+    args = parser.parse_args()
+
+    with open(args.workload, encoding='utf-8') as workload_file:
+        workload = json.load(workload_file)
+
+    if args.streams:
+        result = run_streams(args.url, workload, args.streams, args.timeout)
+    elif args.bulk:
+        result = run_bulk_comparison(args.url, workload, args.poll_interval, args.timeout)
+    else:
+        result = run_workload(args.url, workload, args.poll_interval, args.timeout)
+    print(json.dumps(result, indent=2))
+    if result['rejected'] or result['coalesced']:
+        print(f"{result['rejected']} requests were rejected and {result['coalesced']} coalesced; raise the admission limits or change the workload", file=sys.stderr)
+    if result.get('cassette_misses'):
+        print(f"{result['cassette_misses']} LLM calls were not in the cassette; these timings are not comparable", file=sys.stderr)
+    if args.streams and (result['opened'] < args.streams or result['errors']):
+        print(f"{result['opened']} of {args.streams} streams opened, errors: {result['errors']}", file=sys.stderr)
+        sys.exit(1)
+    if result['rejected'] or result['coalesced'] or result.get('cassette_misses'):
+        sys.exit(1)
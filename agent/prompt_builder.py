@@ -0,0 +1,208 @@
+"""Prompt token budgeting, input compaction and per-call LLM usage stats"""
+import math
+import os
+import re
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Caps applied to user-supplied data before it is put into a prompt
+MAX_REQUIREMENTS = int(os.getenv('PROMPT_MAX_REQUIREMENTS', '15'))
+MAX_REQUIREMENT_TOKENS = int(os.getenv('PROMPT_MAX_REQUIREMENT_TOKENS', '40'))
+MAX_SKILLS = int(os.getenv('PROMPT_MAX_SKILLS', '40'))
+MAX_DESCRIPTION_TOKENS = int(os.getenv('PROMPT_MAX_DESCRIPTION_TOKENS', '400'))
+MAX_SUBMISSION_TOKENS = int(os.getenv('PROMPT_MAX_SUBMISSION_TOKENS', '1500'))
+MAX_ANSWER_TOKENS = int(os.getenv('PROMPT_MAX_ANSWER_TOKENS', '80'))
+
+# Limit on the prompt tokens of each call, enforced by shrinking the user-supplied data further
+PROMPT_TOKEN_BUDGETS = {
+    'introduction': int(os.getenv('PROMPT_BUDGET_INTRODUCTION', '300')),
+    'acknowledgment': int(os.getenv('PROMPT_BUDGET_ACKNOWLEDGMENT', '400')),
+    'questions': int(os.getenv('PROMPT_BUDGET_QUESTIONS', '1500')),
+    'answer': int(os.getenv('PROMPT_BUDGET_ANSWER', '1200')),
+    'decision': int(os.getenv('PROMPT_BUDGET_DECISION', '2000')),
+    'verification': int(os.getenv('PROMPT_BUDGET_VERIFICATION', '3000'))
+}
+
+TRUNCATION_MARK = ' [truncated]'
+
+# Words, numbers and single punctuation marks, roughly how BPE tokenizers split text
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+# Average characters per token of a BPE vocabulary on English text
+_CHARS_PER_TOKEN = 4
+
+def _piece_tokens(piece: str) -> int:
+    return max(1, math.ceil(len(piece) / _CHARS_PER_TOKEN))
+
+def count_tokens(text: str) -> int:
+    """Approximate token count without a tokenizer download"""
+    return sum(_piece_tokens(match.group(0)) for match in _TOKEN_PATTERN.finditer(text or ''))
+
+def truncate_text(text: str, max_tokens: int) -> str:
+    """Cut text to at most max_tokens tokens, always at the same place for the same input"""
+    text = str(text or '').strip()
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    allowed = max_tokens - count_tokens(TRUNCATION_MARK)
+    used = 0
+    for match in _TOKEN_PATTERN.finditer(text):
+        used += _piece_tokens(match.group(0))
+        if used > allowed:
+            return text[:match.start()].rstrip() + TRUNCATION_MARK
+    return text
+
+def compact_list(items: list, max_items: int, max_item_tokens: int) -> list:
+    """Deduplicate (case-insensitively, keeping first occurrences), truncate and cap a list of strings"""
+    seen = set()
+    compacted = []
+    for item in items or []:
+        text = truncate_text(' '.join(str(item).split()), max_item_tokens)
+        key = text.lower()
+        if not text or key in seen:
+            continue
+        seen.add(key)
+        compacted.append(text)
+        if len(compacted) == max_items:
+            break
+    return compacted
+
+def compact_requirements(requirements: list) -> list:
+    return compact_list(requirements, MAX_REQUIREMENTS, MAX_REQUIREMENT_TOKENS)
+
+def compact_skills(skills: list) -> list:
+    return compact_list(skills, MAX_SKILLS, 10)
+
+def compact_description(description: str) -> str:
+    return truncate_text(description, MAX_DESCRIPTION_TOKENS)
+
+def compact_answer(answer: str) -> str:
+    return truncate_text(answer, MAX_ANSWER_TOKENS)
+
+def compact_submission(submission_data: dict) -> str:
+    """Submission fields as prompt text, sharing the submission budget evenly between distinct fields"""
+    fields = []
+    seen = set()
+    for field in submission_data.get('fields', []):
+        key = (str(field.get('label', '')).strip().lower(), ' '.join(str(field.get('content', '')).split()).lower())
+        if key in seen:
+            continue
+        seen.add(key)
+        fields.append(field)
+
+    if not fields:
+        return ''
+
+    per_field = max(MAX_SUBMISSION_TOKENS // len(fields), 20)
+    submission_text = ""
+    for field in fields:
+        label = truncate_text(field.get('label', ''), 20)
+        content = truncate_text(field.get('content', ''), per_field)
+        submission_text += f"\n{label}:\n{content}\n"
+    return submission_text
+
+class PromptStats:
+    """Prompt/completion tokens and latency per call type"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, call: str) -> dict:
+        return self._calls.setdefault(call, {
+            'calls': 0,
+            'failures': 0,
+            'truncated': 0,
+            'prompt_tokens': 0,
+            'completion_tokens': 0,
+            'max_prompt_tokens': 0,
+            'total_latency': 0.0,
+            'max_latency': 0.0
+        })
+
+    def record(self, call: str, prompt_tokens: int, completion_tokens: int, latency: float, failed: bool):
+        with self._lock:
+            entry = self._entry(call)
+            entry['calls'] += 1
+            entry['failures'] += int(failed)
+            entry['prompt_tokens'] += prompt_tokens
+            entry['completion_tokens'] += completion_tokens
+            entry['max_prompt_tokens'] = max(entry['max_prompt_tokens'], prompt_tokens)
+            entry['total_latency'] += latency
+            entry['max_latency'] = max(entry['max_latency'], latency)
+
+    def record_truncation(self, call: str):
+        with self._lock:
+            self._entry(call)['truncated'] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                call: {
+                    **entry,
+                    'avg_prompt_tokens': round(entry['prompt_tokens'] / entry['calls'], 1),
+                    'avg_completion_tokens': round(entry['completion_tokens'] / entry['calls'], 1),
+                    'avg_latency': round(entry['total_latency'] / entry['calls'], 4),
+                    'total_latency': round(entry['total_latency'], 4),
+                    'max_latency': round(entry['max_latency'], 4)
+                }
+                for call, entry in self._calls.items()
+                if entry['calls']
+            }
+
+prompt_stats = PromptStats()
+
+def fit_prompt(call: str, template: str, system: str = '', **fields) -> str:
+    """Fill in a prompt template, shrinking only the user-supplied fields so the prompt fits the call's budget
+
+    The template text holds the instructions and is never cut, so an oversized
+    submission cannot push the decision rules out of the prompt.
+    """
+    budget = PROMPT_TOKEN_BUDGETS.get(call)
+    fields = {name: str(value) for name, value in fields.items()}
+    sizes = {name: count_tokens(value) for name, value in fields.items()}
+    fixed_tokens = count_tokens(system) + count_tokens(template.format(**{name: '' for name in fields}))
+    if not budget or fixed_tokens + sum(sizes.values()) <= budget:
+        return template.format(**fields)
+
+    # Share what is left evenly; fields smaller than their share hand the rest to the bigger ones
+    remaining = max(budget - fixed_tokens, 0)
+    pending = sorted(fields, key=lambda name: sizes[name])
+    fitted = {}
+    while pending:
+        name = pending.pop(0)
+        share = remaining // (len(pending) + 1)
+        if sizes[name] <= share:
+            fitted[name] = fields[name]
+        else:
+            fitted[name] = truncate_text(fields[name], share) if share > count_tokens(TRUNCATION_MARK) else ''
+        remaining -= count_tokens(fitted[name])
+
+    prompt_stats.record_truncation(call)
+    return template.format(**fitted)
+
+def complete(client, call: str, messages: list, max_tokens: int, model: str = "asi1-mini"):
+    """chat.completions.create, recording token counts and latency of the call"""
+    prompt_tokens = sum(count_tokens(message['content']) for message in messages)
+    started = time.perf_counter()
+    try:
+        response = client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+        )
+    except Exception:
+        prompt_stats.record(call, prompt_tokens, 0, time.perf_counter() - started, True)
+        raise
+
+    latency = time.perf_counter() - started
+    usage = getattr(response, 'usage', None)
+    if usage is not None and getattr(usage, 'prompt_tokens', None) is not None:
+        prompt_tokens = usage.prompt_tokens
+        completion_tokens = usage.completion_tokens or 0
+    else:
+        completion_tokens = count_tokens(str(response.choices[0].message.content))
+    prompt_stats.record(call, prompt_tokens, completion_tokens, latency, False)
+    return response
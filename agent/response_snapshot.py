@@ -0,0 +1,63 @@
+"""Pre-encoded JSON responses for interactions that no longer change"""
+import gzip
+import os
+from dotenv import load_dotenv
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    import json
+
+load_dotenv()
+
+# Also keep a gzip copy of completed snapshots for clients that accept it
+SNAPSHOT_GZIP = os.getenv('SNAPSHOT_GZIP', 'true').lower() == 'true'
+SNAPSHOT_GZIP_MIN_BYTES = int(os.getenv('SNAPSHOT_GZIP_MIN_BYTES', '512'))
+
+snapshot_stats = {'built': 0, 'served': 0, 'invalidated': 0}
+
+def encode_json(payload) -> bytes:
+    """Encode with orjson when installed, stdlib json otherwise"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+def get_snapshot(record: dict, build_payload) -> dict:
+    """Encoded body of a completed interaction, built once on first use
+
+    Snapshots are stamped with the record's snapshot version. A poll that was
+    building one while another thread modified the record and called
+    invalidate_snapshot() stores it under the old version, so it is never served again.
+    """
+    version = record.get('_snapshot_version', 0)
+    snapshot = record.get('_snapshot')
+    if snapshot is not None and snapshot['version'] == version:
+        snapshot_stats['served'] += 1
+        return snapshot
+
+    body = encode_json(build_payload())
+    snapshot = {'version': version, 'body': body, 'gzip': None}
+    if SNAPSHOT_GZIP and len(body) >= SNAPSHOT_GZIP_MIN_BYTES:
+        snapshot['gzip'] = gzip.compress(body, compresslevel=6)
+    record['_snapshot'] = snapshot
+    snapshot_stats['built'] += 1
+    return snapshot
+
+def invalidate_snapshot(record: dict):
+    """Drop the cached body after a completed interaction is modified; call after the change"""
+    record['_snapshot_version'] = record.get('_snapshot_version', 0) + 1
+    if record.pop('_snapshot', None) is not None:
+        snapshot_stats['invalidated'] += 1
+
+def interaction_body(record: dict, build_payload, accept_encoding: str = '') -> tuple:
+    """Encoded status payload and extra headers, from the frozen snapshot once completed"""
+    if record.get('status') != 'completed':
+        return encode_json(build_payload()), {}
+
+    snapshot = get_snapshot(record, build_payload)
+    if snapshot['gzip'] is None:
+        return snapshot['body'], {}
+    if 'gzip' in accept_encoding:
+        return snapshot['gzip'], {'Content-Encoding': 'gzip', 'Vary': 'Accept-Encoding'}
+    return snapshot['body'], {'Vary': 'Accept-Encoding'}
@@ -0,0 +1,124 @@
+"""Priority and fair-share scheduling of Client Agent work"""
+import heapq
+import itertools
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Interactions the Client Agent works on at once, across all classes (0 disables the cap)
+MAX_ACTIVE_INTERACTIONS = int(os.getenv('MAX_ACTIVE_INTERACTIONS', '20'))
+# Slots of MAX_ACTIVE_INTERACTIONS that only the first job class may take, so a verification
+# never waits for a whole evaluation conversation to end
+RESERVED_VERIFICATION_SLOTS = int(os.getenv('RESERVED_VERIFICATION_SLOTS', '2'))
+
+# Job classes in priority order: payment-blocking verifications go before new evaluations
+JOB_CLASSES = ('verification', 'evaluation')
+
+class FairScheduler:
+    """Strict priority between job classes, self-clocked fair queuing between flows within a class"""
+
+    def __init__(self, max_active: int = MAX_ACTIVE_INTERACTIONS, job_classes: tuple = JOB_CLASSES, reserved: int = RESERVED_VERIFICATION_SLOTS):
+        self.max_active = max_active
+        self.reserved = reserved
+        self._job_classes = job_classes
+        self._queues = {
+            job_class: {
+                'heap': [],
+                'virtual_time': 0.0,
+                'flow_finish': {},
+                'dispatched': 0,
+                'total_wait': 0.0,
+                'max_wait': 0.0
+            }
+            for job_class in job_classes
+        }
+        # key -> job class of every dispatched job still holding a slot
+        self._active = {}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def submit(self, job_class: str, key: str, flow: str, job: dict, cost: float = 1.0):
+        """Queue a job; cost is its relative amount of work"""
+        with self._lock:
+            queue = self._queues[job_class]
+            # Jobs run in virtual finish time order, so a flow with a hundred queued jobs
+            # cannot push another flow's single job to the back of the line
+            finish = max(queue['virtual_time'], queue['flow_finish'].get(flow, 0.0)) + cost
+            queue['flow_finish'][flow] = finish
+            heapq.heappush(queue['heap'], (finish, next(self._sequence), key, flow, job, time.monotonic()))
+
+    def next_job(self):
+        """(job class, job) to start next, holding a slot until release(key); None if idle or full"""
+        with self._lock:
+            for position, job_class in enumerate(self._job_classes):
+                queue = self._queues[job_class]
+                if not queue['heap'] or not self._has_slot(position):
+                    continue
+
+                finish, _, key, flow, job, submitted = heapq.heappop(queue['heap'])
+                queue['virtual_time'] = finish
+                if queue['flow_finish'].get(flow) == finish:
+                    # Flow has nothing else queued
+                    del queue['flow_finish'][flow]
+
+                wait = time.monotonic() - submitted
+                queue['dispatched'] += 1
+                queue['total_wait'] += wait
+                queue['max_wait'] = max(queue['max_wait'], wait)
+
+                self._active[key] = job_class
+                return job_class, job
+            return None
+
+    def _has_slot(self, position: int) -> bool:
+        """Whether the job class at this priority position may start another job"""
+        if not self.max_active:
+            return True
+        limit = self.max_active if position == 0 else max(self.max_active - self.reserved, 1)
+        return len(self._active) < limit
+
+    def release(self, key: str):
+        """Free the slot of a finished job; unknown keys are ignored"""
+        with self._lock:
+            self._active.pop(key, None)
+
+    def remove(self, key: str):
+        """Take a job that has not started yet out of the queue"""
+        with self._lock:
+            for queue in self._queues.values():
+                for index, entry in enumerate(queue['heap']):
+                    if entry[2] != key:
+                        continue
+
+                    queue['heap'].pop(index)
+                    heapq.heapify(queue['heap'])
+                    flow = entry[3]
+                    if not any(other[3] == flow for other in queue['heap']):
+                        queue['flow_finish'].pop(flow, None)
+                    return entry[4]
+            return None
+
+    def depth(self, job_class: str) -> int:
+        return len(self._queues[job_class]['heap'])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'max_active': self.max_active,
+                'reserved': self.reserved,
+                'active': len(self._active),
+                'classes': {
+                    job_class: {
+                        'queued': len(queue['heap']),
+                        'active': sum(1 for active_class in self._active.values() if active_class == job_class),
+                        'queued_flows': len(queue['flow_finish']),
+                        'dispatched': queue['dispatched'],
+                        'avg_wait': round(queue['total_wait'] / queue['dispatched'], 4) if queue['dispatched'] else 0.0,
+                        'max_wait': round(queue['max_wait'], 4)
+                    }
+                    for job_class, queue in self._queues.items()
+                }
+            }
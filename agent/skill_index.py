@@ -0,0 +1,128 @@
+"""Skill pre-screening of candidates without LLM calls"""
+import os
+import re
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# off: evaluate everyone, reject: fail clear non-matches, deprioritize: evaluate best matches first
+SKILL_PRESCREEN_MODE = os.getenv('SKILL_PRESCREEN_MODE', 'off').lower()
+# Candidates covering this share of the requirements or less are clear non-matches
+SKILL_PRESCREEN_THRESHOLD = float(os.getenv('SKILL_PRESCREEN_THRESHOLD', '0'))
+
+# Weight of a single evaluation deprioritized by the pre-screen in the scheduler's fair queuing
+SKILL_PRESCREEN_DEPRIORITIZED_COST = float(os.getenv('SKILL_PRESCREEN_DEPRIORITIZED_COST', '4'))
+_NON_SKILL_CHARS = re.compile(r'[^a-z0-9+#.]+')
+
+def _singular(word: str) -> str:
+    """Drop a simple English plural ending (apis -> api, technologies -> technology)"""
+    if len(word) <= 3 or not word.isalpha():
+        # Short names and tech names like aws, node.js or c# are left alone
+        return word
+    if word.endswith('ies'):
+        return word[:-3] + 'y'
+    if word.endswith('sses'):
+        return word[:-2]
+    if word.endswith('s') and not word.endswith(('ss', 'us')):
+        return word[:-1]
+    return word
+
+def normalize_skill(skill: str) -> str:
+    """Lowercase a skill, keep only characters that matter in tech names (c++, c#, node.js) and singularize words"""
+    text = _NON_SKILL_CHARS.sub(' ', str(skill).lower()).replace('. ', ' ')
+    return ' '.join(_singular(word) for word in text.split()).strip('.')
+
+def normalize_skills(skills: list) -> set:
+    normalized = {normalize_skill(skill) for skill in skills or []}
+    normalized.discard('')
+    return normalized
+
+def requirement_phrases(requirement: str, max_words: int):
+    """Every run of up to max_words consecutive words of a normalized requirement"""
+    words = normalize_skill(requirement).split()
+    for size in range(1, min(max_words, len(words)) + 1):
+        for start in range(len(words) - size + 1):
+            yield ' '.join(words[start:start + size])
+
+def skill_coverage(requirements: list, skills: list) -> float:
+    """Share of requirements that name at least one of the skills"""
+    if not requirements:
+        return 1.0
+
+    normalized = normalize_skills(skills)
+    if not normalized:
+        return 0.0
+
+    max_words = max(skill.count(' ') + 1 for skill in normalized)
+    covered = sum(
+        1 for requirement in requirements
+        if any(phrase in normalized for phrase in requirement_phrases(requirement, max_words))
+    )
+    return covered / len(requirements)
+
+class SkillIndex:
+    """Maps normalized skills to the candidates that list them, so a whole batch is scored in one pass"""
+
+    def __init__(self):
+        self._profiles_by_skill = {}
+        self._max_words = 1
+
+    def add(self, key, skills: list):
+        for skill in normalize_skills(skills):
+            self._profiles_by_skill.setdefault(skill, set()).add(key)
+            self._max_words = max(self._max_words, skill.count(' ') + 1)
+
+    def _matching_profiles(self, requirement: str) -> set:
+        """Candidates holding any skill that appears as a phrase in the requirement"""
+        matches = set()
+        for phrase in requirement_phrases(requirement, self._max_words):
+            holders = self._profiles_by_skill.get(phrase)
+            if holders:
+                matches |= holders
+        return matches
+
+    def coverage(self, requirements: list) -> dict:
+        """Share of requirements covered by each indexed candidate that covers at least one"""
+        if not requirements:
+            return {}
+
+        counts = {}
+        for requirement in requirements:
+            for key in self._matching_profiles(requirement):
+                counts[key] = counts.get(key, 0) + 1
+
+        return {key: count / len(requirements) for key, count in counts.items()}
+
+prescreen_stats = {'screened': 0, 'rejected': 0}
+
+def _screen(coverage: float) -> dict:
+    non_match = SKILL_PRESCREEN_MODE != 'off' and coverage <= SKILL_PRESCREEN_THRESHOLD
+    prescreen_stats['screened'] += 1
+    if non_match and SKILL_PRESCREEN_MODE == 'reject':
+        prescreen_stats['rejected'] += 1
+    return {'coverage': round(coverage, 4), 'non_match': non_match}
+
+def prescreen(requirements: list, profile: dict) -> dict:
+    """Score one received profile against the task requirements using its own skills"""
+    return _screen(skill_coverage(requirements, profile.get('skills', [])))
+
+def prescreen_batch(requirements: list, profiles: list) -> list:
+    """Score every profile of a bulk evaluation, in order, through one index of the batch's skills
+
+    Each requirement phrase is looked up once for the whole batch instead of once per candidate.
+    """
+    if not requirements:
+        return [_screen(1.0) for _ in profiles]
+
+    index = SkillIndex()
+    for position, profile in enumerate(profiles):
+        index.add(position, profile.get('skills', []))
+    scores = index.coverage(requirements)
+    return [_screen(scores.get(position, 0.0)) for position in range(len(profiles))]
+
+def get_prescreen_stats() -> dict:
+    return {
+        'mode': SKILL_PRESCREEN_MODE,
+        'threshold': SKILL_PRESCREEN_THRESHOLD,
+        **prescreen_stats
+    }
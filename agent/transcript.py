@@ -0,0 +1,85 @@
+"""Compact conversation transcripts for evaluations and verifications"""
+import sys
+import time
+from datetime import datetime
+
+class ConversationEntry:
+    """One conversation turn, stored without per-entry dicts or id strings"""
+    __slots__ = ('seq', 'sender', 'message', 'timestamp', 'is_thinking')
+
+    def __init__(self, seq: int, sender: str, message: str, timestamp: float, is_thinking: bool):
+        self.seq = seq
+        self.sender = sender
+        self.message = message
+        self.timestamp = timestamp
+        self.is_thinking = is_thinking
+
+    def to_json(self) -> dict:
+        """Entry in the JSON shape the frontend expects"""
+        return {
+            'id': str(self.seq),
+            'sender': self.sender,
+            'message': self.message,
+            'timestamp': datetime.fromtimestamp(self.timestamp).isoformat(),
+            'isThinking': self.is_thinking
+        }
+
+class Transcript:
+    """Ordered conversation turns with per-transcript sequence ids"""
+    __slots__ = ('entries', '_next_seq')
+
+    def __init__(self):
+        self.entries = []
+        self._next_seq = 0
+
+    def _entry(self, sender: str, message: str, is_thinking: bool) -> ConversationEntry:
+        seq = self._next_seq
+        self._next_seq += 1
+        return ConversationEntry(seq, sys.intern(sender), message, time.time(), is_thinking)
+
+    def append(self, sender: str, message: str, is_thinking: bool = False) -> ConversationEntry:
+        entry = self._entry(sender, message, is_thinking)
+        self.entries.append(entry)
+        return entry
+
+    def think(self, sender: str, message: str = '') -> ConversationEntry:
+        """Add a placeholder shown while the sender is working"""
+        return self.append(sender, message, is_thinking=True)
+
+    def replace_last(self, sender: str, message: str) -> ConversationEntry:
+        """Swap the last (thinking) entry for the finished message"""
+        entry = self._entry(sender, message, False)
+        self.entries[-1] = entry
+        return entry
+
+    def update(self, entry: ConversationEntry, message: str):
+        """Rewrite an earlier entry in place; None if it is no longer in the transcript"""
+        for index, current in enumerate(self.entries):
+            if current is entry:
+                seq = self._next_seq
+                self._next_seq += 1
+                self.entries[index] = ConversationEntry(seq, entry.sender, message, entry.timestamp, entry.is_thinking)
+                return self.entries[index]
+        return None
+
+    def conclude(self, sender: str, message: str) -> ConversationEntry:
+        """Replace a trailing thinking entry with the message, or append it"""
+        if self.entries and self.entries[-1].is_thinking:
+            return self.replace_last(sender, message)
+        return self.append(sender, message)
+
+    def to_json(self) -> list:
+        return [entry.to_json() for entry in self.entries]
+
+    @property
+    def version(self) -> int:
+        """Changes on every append or replacement"""
+        return self._next_seq
+
+    def __len__(self):
+        return len(self.entries)
+
+def transcript_json(record: dict) -> list:
+    """JSON conversation of an evaluation or verification record"""
+    conversation = record.get('conversation')
+    return conversation.to_json() if conversation is not None else []
@@ -0,0 +1,87 @@
+"""Compare the memory of conversation transcripts before and after the Transcript class
+
+    python transcript_bench.py --interactions 10000 --turns 10
+
+Builds the same conversations twice: as lists of per-turn dicts (uuid4 id, ISO
+timestamp string, sender, message, isThinking) the way the agents stored them
+before, and as Transcript objects. Message texts come from a small shared pool,
+so the numbers are the per-turn overhead that differs between the two layouts.
+"""
+import argparse
+import gc
+import json
+import tracemalloc
+from datetime import datetime
+from uuid import uuid4
+from transcript import Transcript
+
+SENDERS = ('client_agent', 'freelancer_agent')
+MESSAGES = (
+    "Hello, I am going to evaluate if your freelancer has the ability to do this task.",
+    "Understood. I'm ready to provide information about the freelancer.",
+    "Do you have experience in React?",
+    "Yes, the freelancer has experience in React.",
+    "Your freelancer fits the task well. All required skills are confirmed."
+)
+
+def dict_conversation(turns: int) -> list:
+    """Turns as the agents appended them before: a thinking placeholder, then the message"""
+    conversation = []
+    for turn in range(turns):
+        sender = SENDERS[turn % 2]
+        conversation.append({
+            'id': str(uuid4()),
+            'sender': sender,
+            'message': '',
+            'timestamp': datetime.now().isoformat(),
+            'isThinking': True
+        })
+        conversation[-1] = {
+            'id': str(uuid4()),
+            'sender': sender,
+            'message': MESSAGES[turn % len(MESSAGES)],
+            'timestamp': datetime.now().isoformat(),
+            'isThinking': False
+        }
+    return conversation
+
+def transcript_conversation(turns: int) -> Transcript:
+    conversation = Transcript()
+    for turn in range(turns):
+        conversation.think(SENDERS[turn % 2])
+        conversation.replace_last(SENDERS[turn % 2], MESSAGES[turn % len(MESSAGES)])
+    return conversation
+
+def measure(build, interactions: int, turns: int) -> dict:
+    """Bytes still allocated once every conversation has been built"""
+    gc.collect()
+    tracemalloc.start()
+    conversations = [build(turns) for _ in range(interactions)]
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    entries = interactions * turns
+    del conversations
+    return {
+        'bytes': current,
+        'peak_bytes': peak,
+        'bytes_per_entry': round(current / entries, 1)
+    }
+
+def run_benchmark(interactions: int, turns: int) -> dict:
+    before = measure(dict_conversation, interactions, turns)
+    after = measure(transcript_conversation, interactions, turns)
+    return {
+        'interactions': interactions,
+        'turns': turns,
+        'dict_entries': before,
+        'transcript': after,
+        'saved_ratio': round(1 - after['bytes'] / before['bytes'], 3)
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--interactions', type=int, default=10000)
+    parser.add_argument('--turns', type=int, default=10)
+    args = parser.parse_args()
+
+    print(json.dumps(run_benchmark(args.interactions, args.turns), indent=2))
@@ -0,0 +1,111 @@
+"""Content-hash cache for work verification results"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Seconds a cached verification stays valid (0 disables the cache)
+VERIFICATION_CACHE_TTL = float(os.getenv('VERIFICATION_CACHE_TTL', '3600'))
+VERIFICATION_CACHE_MAX_ENTRIES = int(os.getenv('VERIFICATION_CACHE_MAX_ENTRIES', '1024'))
+
+def _normalize_text(value) -> str:
+    """Collapse whitespace and case so trivial edits hash the same"""
+    return ' '.join(str(value or '').split()).lower()
+
+def verification_cache_key(task_data: dict, submission_data: dict) -> str:
+    """Hash the normalized task description, requirements and submission fields"""
+    payload = {
+        'description': _normalize_text(task_data.get('description')),
+        'requirements': sorted(_normalize_text(req) for req in task_data.get('requirements') or []),
+        'fields': [
+            [
+                _normalize_text(field.get('type')),
+                _normalize_text(field.get('label')),
+                _normalize_text(field.get('content'))
+            ]
+            for field in submission_data.get('fields', [])
+        ]
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+class VerificationCache:
+    """LRU cache of verification decisions with a TTL and hit-rate counters"""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, key: str):
+        """Return the cached result for key, or None on a miss"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if time.monotonic() - entry['stored_at'] > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry['result']
+
+    def put(self, key: str, decision: str, feedback: str):
+        """Store a verification decision and its feedback"""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._entries[key] = {
+                'result': {'decision': decision, 'feedback': feedback},
+                'stored_at': time.monotonic()
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record_bypass(self):
+        with self._lock:
+            self.bypasses += 1
+
+    def stats(self) -> dict:
+        """Hit-rate metrics for the /metrics endpoint"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'ttl_seconds': self.ttl,
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'bypasses': self.bypasses,
+                'expirations': self.expirations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+verification_cache = VerificationCache(
+    ttl=VERIFICATION_CACHE_TTL,
+    max_entries=VERIFICATION_CACHE_MAX_ENTRIES
+)
@@ -116,6 +116,7 @@ const TaskSubmission: React.FC = () => {
 
       await taskService.submitWork(task!.id, submissionData);
       
+      const walletAddress = localStorage.getItem('walletAddress');
       const response = await fetch('http://localhost:5000/verify-submission', {
         method: 'POST',
         headers: {
@@ -124,7 +125,9 @@ const TaskSubmission: React.FC = () => {
         body: JSON.stringify({
           task_description: task!.description,
           task_requirements: task!.requirements,
-          submission_data: submissionData
+          submission_data: submissionData,
+          task_id: task!.id,
+          freelancer_wallet: walletAddress
         }),
       });
 
@@ -133,7 +136,6 @@ const TaskSubmission: React.FC = () => {
         setInteractionId(data.interaction_id);
         setIsDrawerOpen(true);
         
-        const walletAddress = localStorage.getItem('walletAddress');
         localStorage.setItem('currentVerification', JSON.stringify({
           taskId: task!.id,
           wallet: walletAddress